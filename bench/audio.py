@@ -0,0 +1,85 @@
+import argparse
+import os
+import time
+
+import pygame as pg
+
+from src.assets import Assets
+from src.audio import Audio
+
+
+def init():
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    pg.init()
+    pg.mixer.init()
+
+
+def direct(sounds, shooters, frames, fps):
+    # Как было: общий Sound, громкость ставится на него же, каждый выстрел - свой play()
+    shoot = sounds["shoot.wav"]
+    boss = sounds["bosscoming.wav"]
+    calls = 0
+    boss_played = 0
+    start = time.process_time()
+    for f in range(frames):
+        for i in range(shooters):
+            shoot.set_volume(0.12 if i % 2 else 0.14)
+            shoot.play()
+            calls += 1
+        if f % 30 == 0:
+            boss_played += boss.play() is not None
+            calls += 1
+        time.sleep(1.0 / fps)
+    return time.process_time() - start, calls, boss_played
+
+
+def managed(assets, audio, shooters, frames, fps):
+    cues = [assets.sound("shoot.wav", volume=0.12 if i % 2 else 0.14) for i in range(shooters)]
+    boss = assets.sound("bosscoming.wav", volume=0.8)
+    played = 0
+    start = time.process_time()
+    for f in range(frames):
+        for cue in cues:
+            cue.play()
+        if f % 30 == 0:
+            boss.play()
+            before = audio.played
+            audio.flush()
+            played += any(o is not None and o[0] == "bosscoming.wav" for o in audio.owners) and audio.played > before
+        else:
+            audio.flush()
+        time.sleep(1.0 / fps)
+    return time.process_time() - start, audio.played, played
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mixer cost of a firing formation: direct Sound.play vs the voice manager")
+    parser.add_argument("--shooters", type=int, default=40, help="sounds requested per frame")
+    parser.add_argument("--frames", type=int, default=240)
+    parser.add_argument("--fps", type=int, default=60)
+    args = parser.parse_args(argv)
+    init()
+
+    assets = Assets()
+    assets.audio = audio = Audio()
+    for name in ("shoot.wav", "bosscoming.wav"):
+        assets.sound(name)
+    sounds = assets._snd_cache
+
+    pg.mixer.stop()
+    d_time, d_calls, d_boss = direct(sounds, args.shooters, args.frames, args.fps)
+    pg.mixer.stop()
+    m_time, m_calls, m_boss = managed(assets, audio, args.shooters, args.frames, args.fps)
+    boss_total = (args.frames + 29) // 30
+
+    print(f"{args.shooters} shots per frame, {args.frames} frames, {len(audio.channels)} channels")
+    # CPU процесса, включая поток микшера SDL, на кадр
+    print(f"{'mode':<8} {'cpu ms/frame':>12} {'play calls':>11} {'boss cue':>9}")
+    print(f"{'direct':<8} {d_time * 1000 / args.frames:>12.3f} {d_calls:>11} {d_boss:>5}/{boss_total}")
+    print(f"{'manager':<8} {m_time * 1000 / args.frames:>12.3f} {m_calls:>11} {m_boss:>5}/{boss_total}")
+    print(audio.stats())
+
+
+if __name__ == "__main__":
+    main()
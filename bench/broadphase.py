@@ -0,0 +1,94 @@
+import argparse
+import random
+import time
+
+import pygame as pg
+
+from src.config import WIDTH, HEIGHT
+from src.broadphase import SpatialHash
+
+
+def _sprite(x, y, w, h):
+    s = pg.sprite.Sprite()
+    s.rect = pg.Rect(0, 0, w, h)
+    s.rect.center = (x, y)
+    return s
+
+
+def build_scene(bullets, rng):
+    # Формация _v_shape из 11 кораблей, метеоры и облако пуль игрока/противников
+    enemies = pg.sprite.Group()
+    for i in range(11):
+        d = abs(i - 5)
+        enemies.add(_sprite(WIDTH // 2 + (i - 5) * 92, 70 + d * 70, 74, 50))
+    meteors = pg.sprite.Group(_sprite(rng.randint(40, WIDTH - 40), rng.randint(0, HEIGHT), 66, 66) for _ in range(24))
+    bosses = pg.sprite.Group(_sprite(WIDTH // 2, 210, 280, 200))
+    bullets_player = pg.sprite.Group(
+        _sprite(rng.randint(0, WIDTH), rng.randint(0, HEIGHT), 10, 18) for _ in range(bullets))
+    bullets_enemy = pg.sprite.Group(
+        _sprite(rng.randint(0, WIDTH), rng.randint(0, HEIGHT), 10, 16) for _ in range(bullets // 2))
+    player = _sprite(WIDTH // 2, HEIGHT - 88, 74, 84)
+    return player, enemies, bosses, meteors, bullets_player, bullets_enemy
+
+
+def tick_bruteforce(scene):
+    player, enemies, bosses, meteors, bullets_player, bullets_enemy = scene
+    pg.sprite.groupcollide(enemies, bullets_player, False, False)
+    pg.sprite.groupcollide(bosses, bullets_player, False, False)
+    pg.sprite.groupcollide(meteors, bullets_player, False, False)
+    pg.sprite.spritecollide(player, bullets_enemy, False)
+    pg.sprite.spritecollide(player, enemies, False)
+    pg.sprite.spritecollide(player, meteors, False)
+
+
+def tick_grid(scene, grid):
+    player, enemies, bosses, meteors, bullets_player, bullets_enemy = scene
+    grid.reset()
+    grid.groupcollide(enemies, bullets_player, False, False)
+    grid.groupcollide(bosses, bullets_player, False, False)
+    grid.groupcollide(meteors, bullets_player, False, False)
+    grid.spritecollide(player, bullets_enemy, False)
+    grid.spritecollide(player, enemies, False)
+    grid.spritecollide(player, meteors, False)
+
+
+def _time(fn, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat
+
+
+def _same_hits(scene, grid):
+    player, enemies, bosses, meteors, bullets_player, bullets_enemy = scene
+    grid.reset()
+    for group in (enemies, bosses, meteors):
+        a = pg.sprite.groupcollide(group, bullets_player, False, False)
+        b = grid.groupcollide(group, bullets_player, False, False)
+        if a != b:
+            return False
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Brute-force groupcollide vs SpatialHash broadphase")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    print(f"{'bullets':>8} {'brute ms':>10} {'grid ms':>10} {'speedup':>8}")
+    for n in args.sizes:
+        rng = random.Random(args.seed)
+        scene = build_scene(n, rng)
+        grid = SpatialHash()
+        if not _same_hits(scene, grid):
+            raise SystemExit(f"hit dicts differ at {n} bullets")
+
+        repeat = max(3, 20000 // max(1, n))
+        brute = _time(lambda: tick_bruteforce(scene), repeat)
+        fast = _time(lambda: tick_grid(scene, grid), repeat)
+        print(f"{n:>8} {brute * 1000:>10.3f} {fast * 1000:>10.3f} {brute / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import argparse
+import time
+
+import numpy as np
+
+from src.config import SIM_HZ
+from src.env import ACTIONS, ShooterEnv, VectorEnv, SubprocVectorEnv
+
+
+def raw(steps, seed):
+    # Голый PlaySession.step с теми же действиями - нижняя граница для среды
+    env = ShooterEnv()
+    env.reset(seed)
+    rng = np.random.default_rng(seed)
+    actions = [ACTIONS[a] for a in rng.integers(len(ACTIONS), size=steps).tolist()]
+    start = time.perf_counter()
+    for act in actions:
+        if env.session.step(1.0 / SIM_HZ, act, render=False) is not None:
+            env.reset(seed)
+    return time.perf_counter() - start
+
+
+def single(steps, seed, frame_size=None):
+    env = ShooterEnv(frame_size=frame_size)
+    env.reset(seed)
+    rng = np.random.default_rng(seed)
+    actions = rng.integers(len(ACTIONS), size=steps).tolist()
+    start = time.perf_counter()
+    for a in actions:
+        _, _, terminated, truncated, _ = env.step(a)
+        if terminated or truncated:
+            env.reset(seed)
+    return time.perf_counter() - start
+
+
+def vector(cls, n, steps, seed, **kwargs):
+    venv = cls(n, **kwargs)
+    venv.reset(seed)
+    rng = np.random.default_rng(seed)
+    actions = rng.integers(len(ACTIONS), size=(steps, n))
+    start = time.perf_counter()
+    for a in actions:
+        venv.step(a)
+    elapsed = time.perf_counter() - start
+    venv.close()
+    return elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-step cost of the env wrappers vs bare PlaySession.step")
+    parser.add_argument("--steps", type=int, default=4000, help="env steps per environment")
+    parser.add_argument("--envs", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    n = args.envs
+    rows = [
+        ("PlaySession.step", raw(args.steps, args.seed), args.steps),
+        ("ShooterEnv", single(args.steps, args.seed), args.steps),
+        ("ShooterEnv frame 128x72", single(args.steps // 4, args.seed, (128, 72)), args.steps // 4),
+        (f"VectorEnv x{n}", vector(VectorEnv, n, args.steps // n, args.seed), args.steps // n * n),
+        (f"SubprocVectorEnv x{n}/{args.workers}",
+         vector(SubprocVectorEnv, n, args.steps // n, args.seed, workers=args.workers), args.steps // n * n),
+    ]
+    base = rows[0][1] / rows[0][2]
+    print(f"{'mode':<28} {'env steps/s':>12} {'us/step':>9} {'overhead':>9}")
+    for name, elapsed, steps in rows:
+        per = elapsed / steps
+        print(f"{name:<28} {steps / elapsed:>12.0f} {per * 1e6:>9.1f} {per * 1e6 - base * 1e6:>+9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import argparse
+import random
+
+from src.config import BULLET_ENGINE
+from src.headless import HeadlessRunner, autofire_policy
+from src.profiler import FrameProfiler, PHASES
+
+
+def storm(count):
+    # count вражеских пуль на экране постоянно плюс обычная стрельба игрока по волне
+    rng = random.Random(1000)
+
+    def setup(session):
+        session.player.hp = 10 ** 9
+
+    def policy(session, tick):
+        bullets = session.bullets
+        img = session.player.bullet_img
+        while bullets.count("enemy") < count:
+            bullets.spawn(img, rng.uniform(0, 1280), rng.uniform(0, 360), rng.uniform(-120, 120), rng.uniform(40, 160), "enemy")
+        return autofire_policy(session, tick)
+
+    return setup, policy
+
+
+def run(precise, bullets, count, ticks, seed):
+    setup, policy = storm(count)
+
+    def setup_mode(session):
+        setup(session)
+        session.precise = precise
+
+    runner = HeadlessRunner(seed=seed, policy=policy, setup=setup_mode, bullet_engine=bullets,
+                            profiler=FrameProfiler(capacity=ticks))
+    stats = runner.run(ticks)
+    prof = runner.profiler
+    collide = prof.phase_ms[:, PHASES.index("collide")].mean()
+    return stats["ticks_per_sec"], prof.frame_ms.mean(), collide
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cost of mask narrowphase and swept bullets vs rect-only collisions")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--ticks", type=int, default=1500)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--bullets", choices=["sprites", "numpy"], default=BULLET_ENGINE)
+    parser.add_argument("--repeat", type=int, default=3, help="best of N runs per mode")
+    args = parser.parse_args(argv)
+
+    print(f"{args.count} enemy bullets, engine={args.bullets}, {args.ticks} ticks, best of {args.repeat}")
+    print(f"{'mode':<8} {'ticks/s':>9} {'tick ms':>9} {'collide ms':>11}")
+    rows = {"rect": [], "precise": []}
+    # Режимы чередуются, чтобы фоновый шум машины делился между ними поровну
+    for _ in range(args.repeat):
+        for precise in (False, True):
+            rows["precise" if precise else "rect"].append(run(precise, args.bullets, args.count, args.ticks, args.seed))
+    best = {}
+    for name, runs in rows.items():
+        best[name] = min(runs, key=lambda r: r[1])
+        tps, tick_ms, collide_ms = best[name]
+        print(f"{name:<8} {tps:>9.0f} {tick_ms:>9.3f} {collide_ms:>11.3f}")
+    # Цена точности - прирост фазы коллизий относительно всего тика без неё; полный тик дополнительно
+    # отличается потому, что точные попадания меняют ход игры
+    extra = (best["precise"][2] - best["rect"][2]) / best["rect"][1]
+    print(f"narrowphase cost: {extra:+.1%} of tick time (whole tick {best['precise'][1] / best['rect'][1] - 1.0:+.1%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+def child(mode):
+    # Отдельный процесс на каждый замер - иначе кэши Assets и импорты уже прогреты
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    from src import scenes
+    from src.config import FONT_CACHE
+    scenes.ASSET_BUNDLE = mode != "png"
+    if mode == "cold" and os.path.exists(FONT_CACHE):
+        # Холодный старт: шрифт ищется в системе заново
+        os.remove(FONT_CACHE)
+
+    game = scenes.Game()
+    game._menu_loop()
+    # Ждём фоновый загрузчик так же, как экран загрузки, затем стартуем игру
+    t = time.perf_counter()
+    if game.loader is not None:
+        game._poll_loader(wait=True)
+    game._start_game()
+    game.play.draw(1.0)
+    play_ms = (time.perf_counter() - t) * 1000.0
+    print(json.dumps({"first_menu_frame_ms": game.first_frame_ms, "start_game_ms": play_ms,
+                      "font_ms": game.font_ms, "bundle": game.assets.bundle is not None}))
+
+
+def measure(mode, runs):
+    rows = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-m", "bench.startup", "--child", mode],
+                             capture_output=True, text=True, check=True).stdout
+        rows.append(json.loads(out.strip().splitlines()[-1]))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time to first menu frame and to the first game frame: PNG vs baked "
+                                                 "bundle, cold (no font cache) vs warm")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--child", choices=["png", "bundle", "cold"], help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child(args.child)
+        return
+
+    # cold - каждый запуск без кэша шрифтов; png и bundle - тёплые запуски с готовым кэшем
+    print(f"{'mode':<8} {'menu ms':>9} {'start ms':>9} {'font ms':>9}")
+    for mode in ("cold", "png", "bundle"):
+        rows = measure(mode, args.runs)
+        if mode != "png" and not rows[0]["bundle"]:
+            print(f"{mode}: assets/bundle.bin missing or stale - run python -m src.bundle")
+            continue
+        menu = statistics.median(r["first_menu_frame_ms"] for r in rows)
+        start = statistics.median(r["start_game_ms"] for r in rows)
+        font = statistics.median(r["font_ms"] for r in rows)
+        print(f"{mode:<8} {menu:>9.1f} {start:>9.1f} {font:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
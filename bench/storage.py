@@ -0,0 +1,85 @@
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from src.storage import JsonStore, SqliteStore, ScoreWriter, make_run
+
+
+def fake_runs(n, seed):
+    rng = random.Random(seed)
+    runs = []
+    for i in range(n):
+        run = make_run(rng.randint(0, 3000), rng.randint(1, 6), rng.uniform(10, 600), i, rng.choice(["win", "lose"]))
+        run["day"] = f"2024-01-{1 + i % 28:02d}"
+        runs.append(run)
+    return runs
+
+
+def stores(folder):
+    return {
+        "json": lambda: JsonStore(os.path.join(folder, "highscore.json"), os.path.join(folder, "runs.jsonl")),
+        "sqlite": lambda: SqliteStore(os.path.join(folder, "scores.db"), os.path.join(folder, "highscore.json")),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="End-of-run latency (sync write vs background writer) and top-N queries")
+    parser.add_argument("--writes", type=int, default=50)
+    parser.add_argument("--history", type=int, default=20000, help="runs in the history for the query timings")
+    args = parser.parse_args(argv)
+
+    print(f"{'backend':<8} {'sync ms':>9} {'submit us':>10} {'top10 ms':>9} {'day top10 ms':>13} {'best ms':>8}")
+    for name in ("json", "sqlite"):
+        with tempfile.TemporaryDirectory() as folder:
+            make = stores(folder)[name]
+            runs = fake_runs(args.writes, 1)
+
+            # Так было: запись на диск прямо в кадре, где закончилась партия
+            store = make()
+            sync = []
+            for run in runs:
+                t = time.perf_counter()
+                store.add_run(run)
+                sync.append((time.perf_counter() - t) * 1000.0)
+            store.close()
+
+            writer = ScoreWriter(make())
+            submit = []
+            for run in runs:
+                t = time.perf_counter()
+                writer.submit(run)
+                submit.append((time.perf_counter() - t) * 1e6)
+            writer.close(timeout=60)
+
+            store = make()
+            for run in fake_runs(args.history, 2):
+                if name == "json":
+                    with open(store.runs_file, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(run) + "\n")
+                else:
+                    db = store._db()
+                    db.execute("INSERT INTO runs (ended_at, day, score, wave, duration, seed, outcome) "
+                               "VALUES (?, ?, ?, ?, ?, ?, ?)", tuple(run[c] for c in SqliteStore.COLUMNS))
+            if name == "sqlite":
+                store._db().commit()
+            t = time.perf_counter()
+            store.top(10)
+            top = (time.perf_counter() - t) * 1000.0
+            t = time.perf_counter()
+            store.top(10, day="2024-01-07")
+            day = (time.perf_counter() - t) * 1000.0
+            t = time.perf_counter()
+            make().best()
+            best = (time.perf_counter() - t) * 1000.0
+            store.close()
+
+            print(f"{name:<8} {statistics.median(sync):>9.3f} {statistics.median(submit):>10.1f} "
+                  f"{top:>9.2f} {day:>13.2f} {best:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+import argparse
+import json
+import os
+import random
+import tracemalloc
+
+from src.config import WIDTH, ENERGY_MAX, BULLET_ENGINE
+from src.headless import HeadlessRunner, autofire_policy, idle_policy
+from src.profiler import FrameProfiler
+from src.sprites import FormationController, FormationEnemy
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+SCENARIOS = {}
+
+
+def scenario(name):
+    def register(fn):
+        SCENARIOS[name] = fn
+        return fn
+    return register
+
+
+def _invulnerable(session):
+    session.player.hp = 10 ** 9
+
+
+@scenario("diamond")
+def diamond():
+    # Первая волна - полная ромбовидная формация; игрок не стреляет, чтобы строй не редел
+    return _invulnerable, idle_policy
+
+
+@scenario("weapon4")
+def weapon4():
+    def setup(session):
+        _invulnerable(session)
+        session.player.weapon_level = 4
+
+    def policy(session, tick):
+        session.player.energy = ENERGY_MAX
+        return autofire_policy(session, tick)
+
+    return setup, policy
+
+
+@scenario("boss")
+def boss():
+    def setup(session):
+        _invulnerable(session)
+        for e in list(session.enemies):
+            e.kill()
+        # Номер волны с боссом берётся из кампании, а не из её нынешней раскладки
+        session.wave.wave_number = next(w.number for w in session.wave.campaign.waves if w.boss is not None)
+        session.spawn_wave()
+        for b in session.bosses:
+            b.hp = 10 ** 9
+
+    return setup, autofire_policy
+
+
+@scenario("meteor_storm")
+def meteor_storm():
+    def policy(session, tick):
+        if tick % 3 == 0:
+            session.pools["meteor"].acquire((session.meteors, session.all_sprites), session.assets, 6, session.rng)
+        return autofire_policy(session, tick)
+
+    return _invulnerable, policy
+
+
+@scenario("swarm")
+def swarm():
+    # Строй из 400 кораблей вместо обычной волны - нагрузка на движок формаций
+    def setup(session):
+        _invulnerable(session)
+        for e in list(session.enemies):
+            e.kill()
+        pts = [(WIDTH // 2 + (x - 20) * 26, y * 34) for y in range(10) for x in range(40)]
+        controller = FormationController(left_span=pts[0][0], right_span=pts[-1][0], start_y=60)
+        session.wave.controller = controller
+        for i, p in enumerate(pts):
+            e = FormationEnemy(session.assets, controller, p, kind="enemy2" if i % 3 else "enemy1", shoot_rate=0.2, rng=session.rng)
+            session.enemies.add(e)
+            session.all_sprites.add(e)
+            session.schedule_fire(e)
+
+    return setup, idle_policy
+
+
+@scenario("bullets5k")
+def bullets5k():
+    rng = random.Random(5000)
+
+    def policy(session, tick):
+        bullets = session.bullets
+        img = session.player.bullet_img
+        while bullets.count("enemy") < 5000:
+            bullets.spawn(img, rng.uniform(0, 1280), rng.uniform(0, 360), rng.uniform(-120, 120), rng.uniform(40, 160), "enemy")
+        return idle_policy(session, tick)
+
+    return _invulnerable, policy
+
+
+def run_scenario(name, ticks, seed, bullet_engine, memory_ticks=600):
+    setup, policy = SCENARIOS[name]()
+    runner = HeadlessRunner(seed=seed, policy=policy, setup=setup, bullet_engine=bullet_engine,
+                            profiler=FrameProfiler(capacity=ticks))
+    stats = runner.run(ticks)
+
+    # Память меряем отдельным, более коротким прогоном: tracemalloc сильно замедляет и исказил бы тайминги
+    setup, policy = SCENARIOS[name]()
+    tracemalloc.start()
+    HeadlessRunner(seed=seed, policy=policy, setup=setup, bullet_engine=bullet_engine).run(min(ticks, memory_ticks))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    p = runner.profiler.percentiles((50, 99))
+    return {
+        "ticks": stats["ticks"],
+        "ticks_per_sec": stats["ticks_per_sec"],
+        "p50_ms": p[50],
+        "p99_ms": p[99],
+        "peak_kb": peak / 1024,
+    }
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for key, r in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        checks = (
+            ("ticks_per_sec", base["ticks_per_sec"] / r["ticks_per_sec"] - 1.0),
+            ("p99_ms", r["p99_ms"] / base["p99_ms"] - 1.0 if base["p99_ms"] else 0.0),
+            ("peak_kb", r["peak_kb"] / base["peak_kb"] - 1.0 if base["peak_kb"] else 0.0),
+        )
+        for metric, worse in checks:
+            if worse > threshold:
+                regressions.append((key, metric, worse))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Seeded stress scenarios for PlaySession under the SDL dummy driver")
+    parser.add_argument("scenarios", nargs="*", metavar="SCENARIO", help=f"any of: {', '.join(sorted(SCENARIOS))}")
+    parser.add_argument("--ticks", type=int, default=3000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--bullets", choices=["sprites", "numpy"], default=BULLET_ENGINE)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="overwrite the baseline with this run")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative slowdown reported as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args(argv)
+
+    names = args.scenarios or sorted(SCENARIOS)
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario: {', '.join(unknown)}")
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    results = {}
+    print(f"{'scenario':<24} {'ticks/s':>9} {'p99 ms':>8} {'peak KB':>9} {'vs baseline':>12}")
+    for name in names:
+        key = f"{name}/{args.bullets}"
+        r = run_scenario(name, args.ticks, args.seed, args.bullets)
+        results[key] = r
+        base = baseline.get(key)
+        delta = f"{r['ticks_per_sec'] / base['ticks_per_sec'] - 1.0:+.1%}" if base else "-"
+        print(f"{key:<24} {r['ticks_per_sec']:>9.0f} {r['p99_ms']:>8.3f} {r['peak_kb']:>9.0f} {delta:>12}")
+
+    if args.save_baseline:
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"baseline saved to {args.baseline}")
+        return
+
+    regressions = compare(results, baseline, args.threshold)
+    for key, metric, worse in regressions:
+        print(f"REGRESSION {key}: {metric} worse by {worse:.1%}")
+    if regressions and args.fail_on_regression:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import argparse
+import json
+import statistics
+import tempfile
+import time
+
+from src.telemetry import Telemetry
+
+
+class SlowDisk(Telemetry):
+    # Диск, который не успевает: каждая пачка пишется с задержкой
+    delay = 0.0
+
+    def _write(self, data):
+        time.sleep(self.delay)
+        super()._write(data)
+
+
+def sync_write(folder, frames, per_frame):
+    # Как было бы без очереди: событие сериализуется и пишется прямо в кадре
+    path = f"{folder}/sync.jsonl"
+    times = []
+    with open(path, "a", encoding="utf-8") as f:
+        for i in range(frames):
+            t = time.perf_counter()
+            for k in range(per_frame):
+                f.write(json.dumps({"t": i, "session": 1, "event": "kill", "kind": "enemy1", "wave": k}) + "\n")
+                f.flush()
+            times.append((time.perf_counter() - t) * 1000.0)
+    return times
+
+
+def queued(folder, frames, per_frame, delay, capacity):
+    SlowDisk.delay = delay
+    tel = SlowDisk(folder, capacity=capacity, interval=0.05)
+    tel.session = 1
+    times = []
+    for i in range(frames):
+        t = time.perf_counter()
+        for k in range(per_frame):
+            tel.emit("kill", kind="enemy1", wave=k)
+        times.append((time.perf_counter() - t) * 1000.0)
+        time.sleep(1.0 / 240)
+    tel.close(timeout=60)
+    return times, tel.stats()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-frame cost of telemetry: inline writes vs the bounded queue")
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--events", type=int, default=20, help="events per frame")
+    parser.add_argument("--capacity", type=int, default=4096)
+    args = parser.parse_args(argv)
+
+    print(f"{args.events} events per frame, {args.frames} frames, queue {args.capacity}")
+    print(f"{'mode':<16} {'p50 ms':>8} {'max ms':>8} {'written':>8} {'dropped':>8}")
+    with tempfile.TemporaryDirectory() as folder:
+        times = sync_write(folder, args.frames, args.events)
+        print(f"{'inline':<16} {statistics.median(times):>8.3f} {max(times):>8.3f} "
+              f"{args.frames * args.events:>8} {0:>8}")
+        for delay in (0.0, 0.2, 2.0):
+            times, stats = queued(folder, args.frames, args.events, delay, args.capacity)
+            print(f"{f'queue, disk +{delay:g}s':<16} {statistics.median(times):>8.3f} {max(times):>8.3f} "
+                  f"{stats['written']:>8} {stats['dropped']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import argparse
+import json
+import math
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import pygame as pg
+
+from src.config import WIDTH
+from src.headless import HeadlessRunner
+from src.sprites import FormationController, FormationEnemy
+from src.waves import load, _cache
+
+
+def make_campaign(n, seed):
+    # Длинная кампания: разные построения и шаги, через каждые 10 волн - не финальный босс
+    rng = random.Random(seed)
+    patterns = {
+        "diamond": {"rows": [1, 2, 3, 2, 1]},
+        "wall": {"rows": [12, 12, 12]},
+        "v": {"v": 13},
+        "ring": {"points": [[round(220 * math.cos(a * math.pi / 8)), round(90 + 90 * math.sin(a * math.pi / 8))]
+                            for a in range(16)]},
+    }
+    waves = []
+    for i in range(n):
+        if i % 10 == 9:
+            waves.append({"boss": {"final": i == n - 1}, "scroll": 300, "meteors": {"every_ms": 1000, "enabled": False}})
+            continue
+        waves.append({
+            "pattern": rng.choice(sorted(patterns)),
+            "dx": rng.choice([64, 78, 92]),
+            "enemy2": round(min(0.2 + i * 0.01, 0.8), 2),
+            "shoot_rate": round(1.0 + i * 0.01, 2),
+            "speed": 170 + i,
+            "scroll": 280 + i % 40,
+            "meteors": {"every_ms": max(520, 1400 - i * 5), "level": 1 + i // 10},
+        })
+    return {"patterns": patterns, "waves": waves}
+
+
+def geometry_spawn(assets, rng, pts_fn):
+    # Как было: точки строя считаются в Python на каждое появление, каждый корабль пишет свой слот
+    pts = pts_fn()
+    controller = FormationController(left_span=min(p[0] for p in pts), right_span=max(p[0] for p in pts), start_y=70)
+    group = pg.sprite.Group()
+    for p in pts:
+        kind = "enemy2" if rng.random() < 0.4 else "enemy1"
+        group.add(FormationEnemy(assets, controller, p, kind=kind, shoot_rate=1.2, rng=rng))
+    return group
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Campaign load time and per-wave spawn cost")
+    parser.add_argument("--waves", type=int, default=500)
+    parser.add_argument("--spawns", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    runner = HeadlessRunner(seed=1)
+    session = runner.new_session()
+    manager = session.wave
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "waves.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(make_campaign(args.waves, 1), f)
+        loads = []
+        for _ in range(5):
+            _cache.clear()
+            t = time.perf_counter()
+            campaign = load(path)
+            loads.append((time.perf_counter() - t) * 1000.0)
+        t = time.perf_counter()
+        load(path)
+        cached = (time.perf_counter() - t) * 1000.0
+        size = os.path.getsize(path)
+    print(f"{len(campaign)} waves ({size // 1024} KB): load {statistics.median(loads):.2f} ms, cached {cached:.3f} ms")
+
+    formations = [w for w in campaign.waves if w.boss is None]
+    manager.campaign = campaign
+    rng = random.Random(2)
+    compiled = []
+    for i in range(args.spawns):
+        w = formations[i % len(formations)]
+        manager.wave_number = w.number
+        group = pg.sprite.Group()
+        t = time.perf_counter()
+        manager.spawn_wave(group, group, group)
+        compiled.append((time.perf_counter() - t) * 1e6 / len(w))
+
+    rows = [12, 12, 12]
+    dx, dy = 78, 70
+
+    def wall():
+        pts = []
+        y = 0
+        for n in rows:
+            x0 = WIDTH // 2 - (n - 1) * dx / 2
+            for i in range(n):
+                pts.append((x0 + i * dx, y))
+            y += dy
+        return pts
+
+    geometry = []
+    for _ in range(args.spawns):
+        t = time.perf_counter()
+        geometry_spawn(session.assets, rng, wall)
+        geometry.append((time.perf_counter() - t) * 1e6 / 36)
+
+    print(f"{'spawn':<10} {'us/ship':>8}")
+    print(f"{'geometry':<10} {statistics.median(geometry):>8.1f}")
+    print(f"{'compiled':<10} {statistics.median(compiled):>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
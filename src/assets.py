@@ -1,53 +1,199 @@
 import os
+import weakref
+
 import pygame as pg
 
+from .surfcache import DERIVED
+
+# Мелкие спрайты для атласа (config.ASSET_ATLAS): файл и размер, как их запрашивают спрайты
+ATLAS_SPRITES = (
+    ("player.png", (74, 84)),
+    ("enemy1.png", (68, 44)),
+    ("enemy2.png", (74, 50)),
+    ("meteor.png", (52, 52)),
+    ("meteor.png", (66, 66)),
+    ("meteor.png", (82, 82)),
+    ("spark.png", (10, 18)),
+    ("spark.png", (10, 16)),
+    ("spark.png", (12, 20)),
+    ("hp.png", (36, 36)),
+    ("hp.png", (28, 28)),
+    ("upgrade_module.png", (38, 38)),
+    ("upgrade_module.png", (26, 26)),
+)
+
+# Маски столкновений по картинке; картинки из Assets общие, поэтому маска считается один раз на вариант.
+# Ключ - слабая ссылка: картинка, вытесненная из DERIVED, уходит вместе со своей маской
+_MASKS = weakref.WeakKeyDictionary()
+
+
+def mask_for(surface):
+    mask = _MASKS.get(surface)
+    if mask is None:
+        mask = _MASKS[surface] = pg.mask.from_surface(surface)
+    return mask
+
+
 class Assets:
-    def __init__(self, base_dir="assets"):
+    def __init__(self, base_dir="assets", bundle=None):
         self.base_dir = base_dir
         self._img_cache = {}
         self._snd_cache = {}
+        # Менеджер голосов (src/audio.py); без него sound() отдаёт None и игра беззвучна
+        self.audio = None
+        self.atlas = None
+        self.bundle = None
+        if bundle is not None:
+            self.use_bundle(bundle)
 
     def _path(self, *parts):
         return os.path.join(self.base_dir, *parts)
 
-    def image(self, rel_path, size=None, fallback_draw=None, alpha=True):
-        key = (rel_path, size, alpha)
-        if key in self._img_cache:
-            return self._img_cache[key].copy()
+    def use_bundle(self, bundle):
+        # Запечённые картинки (src/bundle.py) сразу кладутся в кэши под обычными ключами
+        self.bundle = bundle
+        for rel_path, size, angle, surf in bundle.surfaces():
+            self.store(rel_path, size, surf, angle)
+
+    def _variant_key(self, rel_path, size, alpha, scale, angle, opacity):
+        return (self.base_dir, rel_path, size, alpha, scale, angle, opacity)
+
+    def cached(self, rel_path, size=None, angle=0):
+        if angle:
+            return self._variant_key(rel_path, size, True, None, angle, None) in DERIVED
+        return (rel_path, size, True) in self._img_cache
+
+    def store(self, rel_path, size, surf, angle=0):
+        # Готовая картинка извне (бандл, фоновый загрузчик); convert - только в главном потоке
+        if pg.display.get_surface() is not None:
+            surf = surf.convert_alpha()
+        if angle:
+            DERIVED.put(self._variant_key(rel_path, size, True, None, angle, None), surf)
+        else:
+            self._img_cache[(rel_path, size, True)] = surf
+        return surf
+
+    def store_sound(self, rel_path, sound):
+        self._snd_cache[rel_path] = sound
 
+    def _load(self, rel_path, size, fallback_draw, alpha):
         path = self._path("images", rel_path)
-        surf = None
         if os.path.exists(path):
             surf = pg.image.load(path)
-            surf = surf.convert_alpha() if alpha else surf.convert()
+            # Без видеорежима (headless) convert недоступен - оставляем исходный формат
+            if pg.display.get_surface() is not None:
+                surf = surf.convert_alpha() if alpha else surf.convert()
             if size is not None:
                 surf = pg.transform.smoothscale(surf, size)
+            return surf
+
+        # Плейсхолдер
+        w, h = size if size else (64, 64)
+        surf = pg.Surface((w, h), pg.SRCALPHA)
+        if fallback_draw:
+            fallback_draw(surf)
         else:
-            # Плейсхолдер
-            w, h = size if size else (64, 64)
-            surf = pg.Surface((w, h), pg.SRCALPHA)
-            if fallback_draw:
-                fallback_draw(surf)
-            else:
-                pg.draw.rect(surf, (180, 180, 180), (0, 0, w, h), 2)
+            pg.draw.rect(surf, (180, 180, 180), (0, 0, w, h), 2)
+        return surf
 
-        self._img_cache[key] = surf
-        return surf.copy()
+    def image(self, rel_path, size=None, fallback_draw=None, alpha=True):
+        # Поверхность общая для всех вызывающих - только для чтения.
+        # Кто рисует по картинке или меняет её alpha, берёт image_copy()
+        key = (rel_path, size, alpha)
+        surf = self._img_cache.get(key)
+        if surf is None:
+            surf = self._load(rel_path, size, fallback_draw, alpha)
+            self._img_cache[key] = surf
+        return surf
+
+    def image_copy(self, rel_path, size=None, fallback_draw=None, alpha=True):
+        return self.image(rel_path, size, fallback_draw, alpha).copy()
+
+    def _stamp(self, rel_path):
+        try:
+            st = os.stat(self._path("images", rel_path))
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def variant(self, rel_path, size=None, angle=0, opacity=None, scale=None, fallback_draw=None, alpha=True):
+        # Производные картинки (масштаб, поворот, прозрачность) живут в общем на процесс
+        # кэше DERIVED под ключом исходника и параметров - как и image(), только для чтения
+        if opacity is not None:
+            def build():
+                surf = self.variant(rel_path, size, angle, None, scale, fallback_draw, alpha).copy()
+                surf.set_alpha(opacity)
+                return surf
+            return DERIVED.get_or_build(self._variant_key(rel_path, size, alpha, scale, angle, opacity), build)
+
+        if not angle and scale is None:
+            return self.image(rel_path, size, fallback_draw, alpha)
+
+        def build():
+            surf = self.image(rel_path, size, fallback_draw, alpha)
+            if scale is not None:
+                surf = pg.transform.smoothscale(surf, scale)
+            if angle:
+                surf = pg.transform.rotate(surf, angle)
+            return surf
+        stamp = self._stamp(rel_path) if DERIVED.disk_dir else None
+        return DERIVED.get_or_build(self._variant_key(rel_path, size, alpha, scale, angle, None), build, stamp)
+
+    def mask(self, rel_path, size=None, angle=0):
+        return mask_for(self.variant(rel_path, size, angle))
+
+    def pack_atlas(self, entries=ATLAS_SPRITES, width=512, padding=1):
+        # Мелкие спрайты в одной поверхности; в кэш кладутся subsurface-ы атласа
+        # под теми же ключами, поэтому image() для них ничего не загружает
+        loaded = []
+        for rel_path, size in entries:
+            key = (rel_path, size, True)
+            surf = self._img_cache.get(key)
+            loaded.append((key, surf if surf is not None else self._load(rel_path, size, None, True)))
+        if not loaded:
+            return None
+
+        # Полки: сортировка по высоте, укладка слева направо
+        loaded.sort(key=lambda item: item[1].get_height(), reverse=True)
+        places = []
+        x = y = shelf_h = 0
+        for key, surf in loaded:
+            w, h = surf.get_size()
+            if x and x + w > width:
+                x = 0
+                y += shelf_h + padding
+                shelf_h = 0
+            places.append((key, surf, x, y))
+            x += w + padding
+            shelf_h = max(shelf_h, h)
+
+        atlas = pg.Surface((width, y + shelf_h), pg.SRCALPHA)
+        if pg.display.get_surface() is not None:
+            atlas = atlas.convert_alpha()
+        atlas.fill((0, 0, 0, 0))
+        for key, surf, x, y in places:
+            # MAX поверх прозрачного нуля - точная копия пикселей вместе с alpha
+            atlas.blit(surf, (x, y), special_flags=pg.BLEND_RGBA_MAX)
+            self._img_cache[key] = atlas.subsurface((x, y, *surf.get_size()))
+        self.atlas = atlas
+        return atlas
 
     def sound(self, rel_path, volume=0.4):
-        path = self._path("sounds", rel_path)
-        if not os.path.exists(path):
+        # Общий Sound не трогаем: громкость едет вместе с Cue и ставится на канал при запуске
+        if self.audio is None or not pg.mixer.get_init():
             return None
-        if rel_path in self._snd_cache:
-            s = self._snd_cache[rel_path]
-            s.set_volume(volume)
-            return s
-        s = pg.mixer.Sound(path)
-        s.set_volume(volume)
-        self._snd_cache[rel_path] = s
-        return s
+        s = self._snd_cache.get(rel_path)
+        if s is None:
+            path = self._path("sounds", rel_path)
+            if not os.path.exists(path):
+                return None
+            s = pg.mixer.Sound(path)
+            self._snd_cache[rel_path] = s
+        return self.audio.cue(rel_path, s, volume)
 
     def music(self, rel_path, volume=0.25):
+        if not pg.mixer.get_init():
+            return False
         path = self._path("sounds", rel_path)
         if not os.path.exists(path):
             return False
@@ -0,0 +1,129 @@
+import pygame as pg
+
+from .config import AUDIO_CHANNELS
+
+# Все звуки идут через Audio: число каналов задано явно, у каждого звука есть предел
+# одновременных голосов и приоритет. Запросы копятся до flush() (раз в кадр) - одинаковые
+# звуки одного кадра сливаются в один голос, так что сотня стреляющих врагов стоит микшеру
+# столько же, сколько один
+
+# Файл: (сколько голосов одновременно, приоритет). Звук с более высоким приоритетом
+# может забрать канал у более низкого, когда свободных нет
+RULES = {
+    "bosscoming.wav": (1, 10),
+    "gamelose.wav": (1, 10),
+    "gamewin.wav": (1, 10),
+    "button_press.wav": (1, 8),
+    "splash.wav": (1, 8),
+    "pick_hp.wav": (2, 6),
+    "pick_module.wav": (2, 6),
+    "hit.wav": (2, 5),
+    "explosion.wav": (4, 4),
+    "shoot.wav": (4, 1),
+}
+DEFAULT_RULE = (2, 3)
+
+
+class Cue:
+    __slots__ = ("audio", "name", "sound", "volume", "limit", "priority")
+
+    def __init__(self, audio, name, sound, volume, limit, priority):
+        self.audio = audio
+        self.name = name
+        self.sound = sound
+        # Громкость - свойство этого звучания, а не общего Sound: ставится на канал при запуске
+        self.volume = volume
+        self.limit = limit
+        self.priority = priority
+
+    def play(self, volume=None):
+        self.audio.request(self, self.volume if volume is None else volume)
+
+
+class Audio:
+    def __init__(self, channels=AUDIO_CHANNELS):
+        pg.mixer.set_num_channels(channels)
+        self.channels = [pg.mixer.Channel(i) for i in range(channels)]
+        # Кто занимает канал: (имя, приоритет, порядковый номер запуска)
+        self.owners = [None] * channels
+        self._pending = {}
+        self._serial = 0
+        self.requested = 0
+        self.coalesced = 0
+        self.played = 0
+        self.stolen = 0
+        self.dropped = 0
+
+    def cue(self, name, sound, volume=1.0):
+        limit, priority = RULES.get(name, DEFAULT_RULE)
+        return Cue(self, name, sound, volume, limit, priority)
+
+    def request(self, cue, volume):
+        self.requested += 1
+        pending = self._pending.get(cue.name)
+        if pending is None:
+            self._pending[cue.name] = [cue, volume]
+            return
+        # Тот же звук в этом кадре уже запрошен - остаётся один, самый громкий
+        self.coalesced += 1
+        if volume > pending[1]:
+            pending[1] = volume
+
+    def flush(self):
+        if not self._pending:
+            return
+        pending = sorted(self._pending.values(), key=lambda p: -p[0].priority)
+        self._pending.clear()
+        for cue, volume in pending:
+            self._start(cue, volume)
+
+    def _start(self, cue, volume):
+        owners = self.owners
+        free = None
+        same = []
+        victim = None
+        for i, ch in enumerate(self.channels):
+            if not ch.get_busy():
+                owners[i] = None
+                if free is None:
+                    free = i
+                continue
+            owner = owners[i]
+            if owner is None:
+                continue
+            if owner[0] == cue.name:
+                same.append(i)
+            elif owner[1] < cue.priority and (victim is None or owner[1:] < owners[victim][1:]):
+                # Самый неважный, а среди равных - самый старый голос
+                victim = i
+
+        if len(same) >= cue.limit:
+            # Предел голосов: перезапускается самый старый голос этого же звука
+            i = min(same, key=lambda k: owners[k][2])
+        elif free is not None:
+            i = free
+        elif victim is not None:
+            i = victim
+            self.stolen += 1
+        else:
+            self.dropped += 1
+            return
+
+        ch = self.channels[i]
+        ch.play(cue.sound)
+        # Channel.play сбрасывает громкость канала, поэтому она ставится после запуска
+        ch.set_volume(volume)
+        owners[i] = (cue.name, cue.priority, self._serial)
+        self._serial += 1
+        self.played += 1
+
+    def stats(self):
+        return {
+            "channels": len(self.channels),
+            "busy": sum(1 for ch in self.channels if ch.get_busy()),
+            "requested": self.requested,
+            "coalesced": self.coalesced,
+            "played": self.played,
+            "stolen": self.stolen,
+            "dropped": self.dropped,
+        }
@@ -0,0 +1,204 @@
+import argparse
+import ast
+import importlib
+import itertools
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+
+from . import config
+from .config import BULLET_ENGINE
+from .headless import HeadlessRunner, POLICIES
+from .profiler import FrameProfiler
+
+# Пакетный прогон PlaySession для подбора баланса: каждая партия - отдельная задача
+# в пуле процессов со своим seed и своими значениями из config
+
+_RUNNER = None
+_BULLETS = None
+
+# Эти значения читаются один раз при импорте (кэши, аргументы по умолчанию), один раз на процесс
+# (ресурсы собираются при создании раннера) или не участвуют в партии без окна: подмена ничего
+# бы не изменила, поэтому такие --set/--sweep отклоняются
+FIXED_AT_IMPORT = ("DERIVED_CACHE_MB", "DERIVED_DISK_CACHE", "AUDIO_CHANNELS", "UI_FONT", "FONT_CACHE",
+                   "REPLAY_CHECK_EVERY", "TELEMETRY_DIR", "TELEMETRY_QUEUE", "TELEMETRY_FILE_MB", "TELEMETRY_FILES",
+                   "ASSET_BUNDLE", "ASSET_ATLAS")
+
+
+def parse_value(text):
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return text
+
+
+def apply_overrides(overrides):
+    # Модули берут константы через "from .config import X", поэтому значение подменяется
+    # и в config, и в каждом модуле src, где это имя привязано к тому же объекту
+    saved = {}
+    for name, value in overrides.items():
+        old = getattr(config, name)
+        saved[name] = old
+        for module in list(sys.modules.values()):
+            if module is not None and module.__name__.startswith(__package__ + "."):
+                if getattr(module, name, None) is old and name in vars(module):
+                    setattr(module, name, value)
+    return saved
+
+
+def resolve_policy(spec):
+    if spec in POLICIES:
+        return POLICIES[spec]
+    # Свой бот: "module:function" с сигнатурой policy(session, tick) -> Action
+    module, _, func = spec.partition(":")
+    return getattr(importlib.import_module(module), func)
+
+
+def _init_worker(bullet_engine):
+    global _RUNNER, _BULLETS
+    _BULLETS = bullet_engine
+    # Картинки и звуки грузятся один раз на процесс и переиспользуются всеми партиями
+    _RUNNER = HeadlessRunner(restart=False, bullet_engine=bullet_engine)
+
+
+def run_job(job):
+    runner = _RUNNER
+    saved = apply_overrides(job["overrides"])
+    try:
+        runner.seed = job["seed"]
+        # Движок пуль и шаг симуляции попадают в сессию аргументами, а не через глобальные имена
+        runner.bullet_engine = config.BULLET_ENGINE if "BULLET_ENGINE" in job["overrides"] else _BULLETS
+        runner.dt = 1.0 / config.SIM_HZ
+        runner.policy = resolve_policy(job["policy"])
+        runner.profiler = FrameProfiler(capacity=job["max_ticks"])
+        runner.results = []
+        runner.session = None
+        stats = runner.run(job["max_ticks"])
+    finally:
+        apply_overrides(saved)
+
+    if stats["sessions"]:
+        session = stats["sessions"][0]
+    else:
+        session = {"result": "timeout", "score": runner.session.score,
+                   "wave": runner.session.wave.wave_number - 1, "ticks": stats["ticks"]}
+    prof = runner.profiler
+    p = prof.percentiles((50, 95, 99))
+    frames = prof.frame_ms[:min(prof.frames, prof.capacity)]
+    return {
+        "run": job["run"],
+        "seed": job["seed"],
+        "policy": job["policy"],
+        "overrides": job["overrides"],
+        **session,
+        "elapsed": stats["elapsed"],
+        "tick_ms_mean": float(frames.mean()) if len(frames) else 0.0,
+        "tick_ms_p50": p[50],
+        "tick_ms_p95": p[95],
+        "tick_ms_p99": p[99],
+        "tick_ms_max": float(frames.max()) if len(frames) else 0.0,
+    }
+
+
+def make_jobs(runs, seed, policy, max_ticks, fixed, sweep):
+    # Каждая комбинация sweep играется на одних и тех же seed - разница между ними только в настройках
+    names = sorted(sweep)
+    combos = itertools.product(*(sweep[n] for n in names)) if names else [()]
+    n = 0
+    for combo in combos:
+        overrides = dict(fixed)
+        overrides.update(zip(names, combo))
+        for i in range(runs):
+            yield {"run": n, "seed": seed + i, "policy": policy, "max_ticks": max_ticks, "overrides": overrides}
+            n += 1
+
+
+def summarize(results):
+    groups = {}
+    for r in results:
+        groups.setdefault(json.dumps(r["overrides"], sort_keys=True), []).append(r)
+    rows = []
+    for key, rs in groups.items():
+        n = len(rs)
+        rows.append({
+            "overrides": key,
+            "games": n,
+            "win_rate": sum(r["result"] == "win" for r in rs) / n,
+            "score": sum(r["score"] for r in rs) / n,
+            "wave": sum(r["wave"] for r in rs) / n,
+            "ticks": sum(r["ticks"] for r in rs) / n,
+            "tick_ms_p99": max(r["tick_ms_p99"] for r in rs),
+        })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run many seeded headless games in parallel with config overrides")
+    parser.add_argument("--runs", type=int, default=100, help="games per config combination")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--policy", default="autofire", help=f"one of {', '.join(sorted(POLICIES))} or module:function")
+    parser.add_argument("--max-ticks", type=int, default=20000, help="games still running after this end as timeout")
+    parser.add_argument("--bullets", choices=["sprites", "numpy"], default=BULLET_ENGINE)
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE", help="config override for every run")
+    parser.add_argument("--sweep", action="append", default=[], metavar="NAME=V1,V2,...",
+                        help="config values to try; several --sweep give every combination")
+    parser.add_argument("--out", default=os.path.join("data", "batch.jsonl"))
+    args = parser.parse_args(argv)
+
+    fixed = {}
+    for item in args.set:
+        name, _, value = item.partition("=")
+        fixed[name] = parse_value(value)
+    sweep = {}
+    for item in args.sweep:
+        name, _, values = item.partition("=")
+        sweep[name] = [parse_value(v) for v in values.split(",")]
+    for name in [*fixed, *sweep]:
+        if not hasattr(config, name):
+            parser.error(f"unknown config value {name}")
+        if name in FIXED_AT_IMPORT:
+            parser.error(f"{name} is read once at startup and cannot be changed per run")
+    resolve_policy(args.policy)
+
+    jobs = list(make_jobs(args.runs, args.seed, args.policy, args.max_ticks, fixed, sweep))
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    print(f"{len(jobs)} games on {args.workers} workers -> {args.out}")
+
+    results = []
+    start = time.perf_counter()
+    with open(args.out, "w", encoding="utf-8") as f:
+        if args.workers > 1:
+            # Партии независимы: процессы не делят состояние, масштабирование упирается только в ядра.
+            # Мелкие пачки задач снижают накладные расходы на пересылку, не ломая балансировку
+            chunk = max(1, min(8, len(jobs) // (args.workers * 4)))
+            pool = mp.Pool(args.workers, initializer=_init_worker, initargs=(args.bullets,))
+            stream = pool.imap_unordered(run_job, jobs, chunksize=chunk)
+        else:
+            pool = None
+            _init_worker(args.bullets)
+            stream = map(run_job, jobs)
+        try:
+            for r in stream:
+                results.append(r)
+                f.write(json.dumps(r) + "\n")
+                f.flush()
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+    elapsed = time.perf_counter() - start
+
+    ticks = sum(r["ticks"] for r in results)
+    print(f"{'overrides':<40} {'games':>6} {'win':>6} {'score':>8} {'wave':>6} {'ticks':>8} {'p99 ms':>7}")
+    for row in summarize(results):
+        print(f"{row['overrides']:<40} {row['games']:>6} {row['win_rate']:>6.1%} {row['score']:>8.1f} "
+              f"{row['wave']:>6.2f} {row['ticks']:>8.0f} {row['tick_ms_p99']:>7.2f}")
+    print(f"{len(results)} games, {ticks} ticks in {elapsed:.1f}s - {len(results) / elapsed:.1f} games/s, "
+          f"{ticks / elapsed:.0f} ticks/s")
+
+
+if __name__ == "__main__":
+    main()
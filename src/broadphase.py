@@ -0,0 +1,125 @@
+from collections import defaultdict
+from operator import attrgetter
+
+CELL_SIZE = 64
+# Множитель упаковки ключа ячейки: строк с |номером| больше половины этого не бывает
+_ROW_SPAN = 1 << 16
+# Группы не больше этого проверяются без сетки
+_LINEAR_MAX = 64
+_width = attrgetter("w")
+_height = attrgetter("h")
+
+
+class SpatialHash:
+    # Однородная сетка из квадратных ячеек cell_size x cell_size: ключ ячейки - (столбец, строка).
+    # Внутри ячейки прямоугольники проверяются пачкой через Rect.collidelistall (на стороне C),
+    # поэтому в Python остаётся только раскладка спрайтов по ячейкам.
+    def __init__(self, cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+        self._index = {}
+
+    def reset(self):
+        # Вызывается раз за тик перед коллизиями: индексы групп строятся лениво при первом запросе
+        self._index.clear()
+
+    def _build(self, group):
+        # Спрайт кладётся только в ячейку своего левого верхнего угла; запрос зато расширяется
+        # вверх и влево на самый большой спрайт группы. Так раскладка - одна вставка на спрайт,
+        # а в ячейках лежат номера спрайтов в группе (по возрастанию)
+        cs = self.cell_size
+        sprites = group.sprites()
+        rects = [s.rect for s in sprites]
+        if len(rects) <= _LINEAR_MAX:
+            # Мелкую группу дешевле проверить целиком одним collidelistall, чем обходить ячейки
+            return None, sprites, rects, 0, 0
+        cells = defaultdict(list)
+        for i, r in enumerate(rects):
+            # Ключ (столбец, строка) упакован в одно число - дешевле кортежа
+            cells[r.x // cs * _ROW_SPAN + r.y // cs].append(i)
+        max_w = max(map(_width, rects), default=1)
+        max_h = max(map(_height, rects), default=1)
+        return cells, sprites, rects, max_w, max_h
+
+    def _cells(self, group):
+        entry = self._index.get(id(group))
+        if entry is None or entry[0] is not group:
+            entry = (group, self._build(group))
+            self._index[id(group)] = entry
+        return entry[1]
+
+    def _query(self, rect, group, index):
+        cells, sprites, rects, max_w, max_h = index
+        alive = group.spritedict
+        if cells is None:
+            return [sprites[k] for k in rect.collidelistall(rects) if sprites[k] in alive]
+        cs = self.cell_size
+        c0 = (rect.x - max_w + 1) // cs
+        c1 = (rect.right - 1) // cs
+        r0 = (rect.y - max_h + 1) // cs
+        r1 = (rect.bottom - 1) // cs
+
+        found = None
+        merged = False
+        for c in range(c0, c1 + 1):
+            base = c * _ROW_SPAN
+            for row in range(r0, r1 + 1):
+                bucket = cells.get(base + row)
+                if bucket is None:
+                    continue
+                if found is None:
+                    found = bucket
+                else:
+                    if not merged:
+                        found = list(found)
+                        merged = True
+                    found += bucket
+        if found is None:
+            return []
+        if merged:
+            # Номера из нескольких ячеек - сортировка возвращает порядок группы
+            found.sort()
+        hits = rect.collidelistall([rects[i] for i in found])
+        return [sprites[found[k]] for k in hits if sprites[found[k]] in alive]
+
+    def spritecollide(self, sprite, group, dokill, collided=None, margin=0):
+        # margin расширяет прямоугольник запроса: так narrowphase видит и пули, пролетевшие мимо за тик
+        if id(group) not in self._index:
+            # Одиночный запрос к неиндексированной группе дешевле сделать линейным проходом, чем строить индекс
+            hit = _scan(sprite, group, collided, margin)
+        else:
+            hit = self._collide(sprite, group, self._cells(group), collided, margin)
+        if dokill:
+            for s in hit:
+                s.kill()
+        return hit
+
+    def _collide(self, sprite, group, cells, collided, margin=0):
+        rect = sprite.rect.inflate(2 * margin, 2 * margin) if margin else sprite.rect
+        hit = self._query(rect, group, cells)
+        if collided is not None:
+            hit = [s for s in hit if collided(sprite, s)]
+        return hit
+
+    def groupcollide(self, groupa, groupb, dokilla, dokillb, collided=None, margin=0):
+        cells = self._cells(groupb)
+        crashed = {}
+        for a in groupa.sprites():
+            c = self._collide(a, groupb, cells, collided, margin)
+            if not c:
+                continue
+            if dokillb:
+                for s in c:
+                    s.kill()
+            crashed[a] = c
+            if dokilla:
+                a.kill()
+        return crashed
+
+
+def _scan(sprite, group, collided=None, margin=0):
+    rect = sprite.rect.inflate(2 * margin, 2 * margin) if margin else sprite.rect
+    sprites = group.sprites()
+    hit = [sprites[i] for i in rect.collidelistall([s.rect for s in sprites])]
+    if collided is not None:
+        hit = [s for s in hit if collided(sprite, s)]
+    return hit
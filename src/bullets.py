@@ -0,0 +1,331 @@
+import math
+import zlib
+
+import numpy as np
+import pygame as pg
+
+from .config import WIDTH, HEIGHT
+from .assets import mask_for
+from .narrowphase import swept_overlap, swept_collide
+
+
+class SpriteBullets:
+    def __init__(self, pools, grid, all_sprites):
+        self.pools = pools
+        self.grid = grid
+        self.all_sprites = all_sprites
+        self.groups = {"player": pg.sprite.Group(), "enemy": pg.sprite.Group()}
+        # Наибольшая скорость пули по осям - на сколько расширять запрос broadphase при заметании
+        self.max_speed = {"player": 0.0, "enemy": 0.0}
+        self.dt = 0.0
+
+    def spawn(self, image, x, y, vx, vy, owner="player"):
+        speed = max(abs(vx), abs(vy))
+        if speed > self.max_speed[owner]:
+            self.max_speed[owner] = speed
+        return self.pools["bullet"].acquire((self.groups[owner], self.all_sprites), image, x, y, vx, vy, owner)
+
+    def _margin(self, owner):
+        return math.ceil(self.max_speed[owner] * self.dt)
+
+    def update(self, dt):
+        self.dt = dt
+        self.groups["player"].update(dt)
+        self.groups["enemy"].update(dt)
+
+    def collide_group(self, group, owner="player", precise=False):
+        if precise:
+            return self.grid.groupcollide(group, self.groups[owner], False, True, swept_collide, self._margin(owner))
+        return self.grid.groupcollide(group, self.groups[owner], False, True)
+
+    def collide_sprite(self, sprite, owner="enemy", precise=False):
+        if precise:
+            return self.grid.spritecollide(sprite, self.groups[owner], True, swept_collide, self._margin(owner))
+        return self.grid.spritecollide(sprite, self.groups[owner], True)
+
+    def count(self, owner):
+        return len(self.groups[owner])
+
+    def digest(self, h):
+        # Пули-спрайты лежат в all_sprites и уже учтены в PlaySession.checksum
+        return h
+
+    def export(self, owner, out):
+        # Центр и скорость первых len(out) пуль в строки out (x, y, vx, vy); вернуть их число
+        n = 0
+        limit = len(out)
+        for s in self.groups[owner]:
+            if n == limit:
+                break
+            out[n] = (s.rect.centerx, s.rect.centery, s.vx, s.vy)
+            n += 1
+        return n
+
+    def draw(self, surface, rects=False, lag=0.0):
+        # Пули-спрайты лежат в all_sprites и рисуются вместе с остальными
+        return []
+
+
+class BulletArray:
+    def __init__(self, capacity=256):
+        self.n = 0
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.vx = np.zeros(capacity)
+        self.vy = np.zeros(capacity)
+        self.img = np.zeros(capacity, dtype=np.int32)
+        # Границы пуль на текущий тик; сбрасываются при любом изменении массивов
+        self.box = None
+        # Наибольшая скорость по осям - на сколько расширять цель при заметании
+        self.max_speed = 0.0
+        # Наибольшая скорость в меньших сторонах пули - есть ли вообще пули, которые надо заметать
+        self.max_reach = 0.0
+
+    def _grow(self):
+        cap = len(self.x) * 2
+        for name in ("x", "y", "vx", "vy", "img"):
+            old = getattr(self, name)
+            new = np.zeros(cap, dtype=old.dtype)
+            new[:self.n] = old[:self.n]
+            setattr(self, name, new)
+
+    def append(self, x, y, vx, vy, img, side=1.0):
+        if self.n == len(self.x):
+            self._grow()
+        i = self.n
+        self.x[i] = x
+        self.y[i] = y
+        self.vx[i] = vx
+        self.vy[i] = vy
+        self.img[i] = img
+        self.n = i + 1
+        self.box = None
+        speed = max(abs(vx), abs(vy))
+        if speed > self.max_speed:
+            self.max_speed = speed
+        if speed > self.max_reach * side:
+            self.max_reach = speed / side
+
+    def keep(self, mask):
+        n = int(np.count_nonzero(mask))
+        for name in ("x", "y", "vx", "vy", "img"):
+            arr = getattr(self, name)
+            arr[:n] = arr[:self.n][mask]
+        self.n = n
+        self.box = None
+
+
+class ArrayBullets:
+    def __init__(self):
+        self.arrays = {"player": BulletArray(), "enemy": BulletArray()}
+        self.images = []
+        self.masks = []
+        self._image_ids = {}
+        self.dt = 0.0
+        self.half_w = np.zeros(0)
+        self.half_h = np.zeros(0)
+        self.sides = np.zeros(0)
+
+    def _image_id(self, image):
+        # Картинки пуль живут в self.images, поэтому id() поверхности стабилен
+        idx = self._image_ids.get(id(image))
+        if idx is None:
+            idx = len(self.images)
+            self.images.append(image)
+            self.masks.append(mask_for(image))
+            self._image_ids[id(image)] = idx
+            w, h = image.get_size()
+            self.half_w = np.append(self.half_w, w / 2)
+            self.half_h = np.append(self.half_h, h / 2)
+            self.sides = np.append(self.sides, max(1, min(w, h)))
+        return idx
+
+    def spawn(self, image, x, y, vx, vy, owner="player"):
+        idx = self._image_id(image)
+        self.arrays[owner].append(x, y, vx, vy, idx, self.sides[idx])
+
+    def _bounds(self, b):
+        if b.box is None:
+            n = b.n
+            ids = b.img[:n]
+            hw = self.half_w[ids]
+            hh = self.half_h[ids]
+            x = b.x[:n]
+            y = b.y[:n]
+            b.box = (x - hw, y - hh, x + hw, y + hh)
+        return b.box
+
+    def update(self, dt):
+        self.dt = dt
+        for b in self.arrays.values():
+            n = b.n
+            if not n:
+                continue
+            b.x[:n] += b.vx[:n] * dt
+            b.y[:n] += b.vy[:n] * dt
+            b.box = None
+            left, top, right, bottom = self._bounds(b)
+            inside = (right >= 0) & (left <= WIDTH) & (bottom >= 0) & (top <= HEIGHT)
+            if not inside.all():
+                b.keep(inside)
+
+    def _margin(self, b):
+        return math.ceil(b.max_speed * self.dt)
+
+    def _fast(self, b):
+        # Заметать нужно только пули, которые за тик пролетают больше своего размера; остальным
+        # хватает обычного прямоугольника и одной маски в конечной точке
+        if b.max_reach * self.dt <= 1:
+            return ()
+        n = b.n
+        step = np.maximum(np.abs(b.vx[:n]), np.abs(b.vy[:n])) * self.dt
+        return np.flatnonzero(step > self.sides[b.img[:n]])
+
+    def _paths(self, b, idx):
+        # Путь левого верхнего угла пули за тик для кандидатов idx - целыми числами. Кандидатов
+        # единицы, поэтому дальше по ним идёт Python, а не numpy с его ценой вызова.
+        # У медленных пуль начала пути нет (None): им хватает одной маски в конечной точке
+        left, top, _, _ = self._bounds(b)
+        dt = self.dt
+        xs = left[idx].tolist()
+        ys = top[idx].tolist()
+        imgs = b.img[idx].tolist()
+        if b.max_reach * dt <= 1:
+            for bi, x, y, img in zip(idx.tolist(), xs, ys, imgs):
+                yield bi, None, None, round(x), round(y), img
+            return
+        sides = self.sides
+        for bi, x, y, vx, vy, img in zip(idx.tolist(), xs, ys, b.vx[idx].tolist(), b.vy[idx].tolist(), imgs):
+            if max(abs(vx), abs(vy)) * dt > sides[img]:
+                yield bi, round(x - vx * dt), round(y - vy * dt), round(x), round(y), img
+            else:
+                yield bi, None, None, round(x), round(y), img
+
+    def collide_group(self, group, owner="player", precise=False):
+        b = self.arrays[owner]
+        targets = group.sprites()
+        if not b.n or not targets:
+            return {}
+
+        r = np.array([tuple(t.rect) for t in targets], dtype=float)
+        tl = r[:, 0:1]
+        tt = r[:, 1:2]
+        tr = tl + r[:, 2:3]
+        tb = tt + r[:, 3:4]
+        left, top, right, bottom = self._bounds(b)
+
+        # Матрица цели x пули; пуля достаётся первой цели в порядке группы, как при dokillb
+        hit = (left < tr) & (right > tl) & (top < tb) & (bottom > tt)
+        fast = self._fast(b) if precise else ()
+        if len(fast):
+            # Заметание: для быстрых пуль цель расширяется на путь самой быстрой за тик, остальное решают маски
+            m = self._margin(b)
+            hit[:, fast] = ((left[fast] < tr + m) & (right[fast] > tl - m)
+                            & (top[fast] < tb + m) & (bottom[fast] > tt - m))
+        any_hit = hit.any(axis=0)
+        if not any_hit.any():
+            return {}
+        idx = np.flatnonzero(any_hit)
+
+        crashed = {}
+        if precise:
+            # Маски проверяются только для пар, прошедших прямоугольный тест
+            any_hit[:] = False
+            masks = self.masks
+            for bi, x0, y0, x1, y1, img in self._paths(b, idx):
+                for ti in np.flatnonzero(hit[:, bi]).tolist():
+                    t = targets[ti]
+                    r = t.rect
+                    if x0 is None:
+                        touched = t.mask.overlap(masks[img], (x1 - r.x, y1 - r.y))
+                    else:
+                        touched = swept_overlap(t.mask, r.x, r.y, masks[img], x0, y0, x1, y1)
+                    if touched:
+                        crashed.setdefault(t, []).append(bi)
+                        any_hit[bi] = True
+                        break
+            if crashed:
+                b.keep(~any_hit)
+            return crashed
+
+        first = hit[:, idx].argmax(axis=0)
+        for ti, bi in zip(first.tolist(), idx.tolist()):
+            t = targets[ti]
+            if t in crashed:
+                crashed[t].append(bi)
+            else:
+                crashed[t] = [bi]
+        b.keep(~any_hit)
+        return crashed
+
+    def collide_sprite(self, sprite, owner="enemy", precise=False):
+        b = self.arrays[owner]
+        if not b.n:
+            return []
+        rl, rt, rw, rh = sprite.rect
+        left, top, right, bottom = self._bounds(b)
+        hit = (left < rl + rw) & (right > rl) & (top < rt + rh) & (bottom > rt)
+        fast = self._fast(b) if precise else ()
+        if len(fast):
+            ql, qt, qw, qh = sprite.rect.inflate(2 * self._margin(b), 2 * self._margin(b))
+            hit[fast] = (left[fast] < ql + qw) & (right[fast] > ql) & (top[fast] < qt + qh) & (bottom[fast] > qt)
+        idx = np.flatnonzero(hit)
+        if not len(idx):
+            return []
+        if precise:
+            mask = sprite.mask
+            masks = self.masks
+            idx = [bi for bi, x0, y0, x1, y1, img in self._paths(b, idx)
+                   if (mask.overlap(masks[img], (x1 - rl, y1 - rt)) if x0 is None
+                       else swept_overlap(mask, rl, rt, masks[img], x0, y0, x1, y1))]
+            if not idx:
+                return []
+            hit[:] = False
+            hit[idx] = True
+            b.keep(~hit)
+            return idx
+        b.keep(~hit)
+        return idx.tolist()
+
+    def count(self, owner):
+        return self.arrays[owner].n
+
+    def digest(self, h):
+        for b in self.arrays.values():
+            h = zlib.crc32(b.x[:b.n].tobytes(), h)
+            h = zlib.crc32(b.y[:b.n].tobytes(), h)
+        return h
+
+    def export(self, owner, out):
+        b = self.arrays[owner]
+        n = min(b.n, len(out))
+        out[:n, 0] = b.x[:n]
+        out[:n, 1] = b.y[:n]
+        out[:n, 2] = b.vx[:n]
+        out[:n, 3] = b.vy[:n]
+        return n
+
+    def draw(self, surface, rects=False, lag=0.0):
+        # lag - насколько отрисовка отстаёт от симуляции: пули рисуются сдвинутыми назад по скорости
+        images = self.images
+        drawn = []
+        for b in self.arrays.values():
+            if not b.n:
+                continue
+            left, top, _, _ = self._bounds(b)
+            if lag:
+                left = left - b.vx[:b.n] * lag
+                top = top - b.vy[:b.n] * lag
+            pos = zip(left.astype(np.int32).tolist(), top.astype(np.int32).tolist())
+            seq = zip(map(images.__getitem__, b.img[:b.n].tolist()), pos)
+            if rects:
+                drawn.extend(surface.blits(seq))
+            else:
+                surface.blits(seq, doreturn=False)
+        return drawn
+
+
+def make_bullet_engine(kind, pools, grid, all_sprites):
+    if kind == "numpy":
+        return ArrayBullets()
+    return SpriteBullets(pools, grid, all_sprites)
@@ -0,0 +1,134 @@
+import json
+import mmap
+import os
+import struct
+
+import pygame as pg
+
+from .assets import Assets, ATLAS_SPRITES
+
+MAGIC = b"SSB1"
+ALIGN = 64
+BUNDLE_PATH = os.path.join("assets", "bundle.bin")
+
+# Все варианты картинок, которые запрашивает игра: файл, размер, поворот
+BAKE_SPECS = (
+    *((rel_path, size, 0) for rel_path, size in ATLAS_SPRITES),
+    ("boss.png", (280, 200), 0),
+    ("spark.png", (40, 40), 0),
+    ("spark.png", (10, 16), 180),
+    ("spark.png", (12, 20), 180),
+)
+
+
+def _source_stamp(path):
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+
+def bake(base_dir="assets", path=BUNDLE_PATH, specs=BAKE_SPECS):
+    assets = Assets(base_dir)
+    sources = {}
+    entries = []
+    blobs = []
+    offset = 0
+    for rel_path, size, angle in specs:
+        src = os.path.join(base_dir, "images", rel_path)
+        # Плейсхолдеры не запекаем: без файла игра всё равно рисует их сама
+        if not os.path.exists(src):
+            continue
+        sources[rel_path] = _source_stamp(src)
+        surf = assets.variant(rel_path, size, angle) if angle else assets.image(rel_path, size)
+        data = pg.image.tobytes(surf, "RGBA")
+        w, h = surf.get_size()
+        entries.append({"path": rel_path, "size": list(size), "angle": angle, "w": w, "h": h,
+                        "offset": offset, "length": len(data)})
+        blobs.append(data)
+        offset += len(data)
+        pad = -offset % ALIGN
+        if pad:
+            blobs.append(bytes(pad))
+            offset += pad
+
+    header = json.dumps({"sources": sources, "entries": entries}).encode("utf-8")
+    # Данные начинаются с выровненного смещения сразу после заголовка
+    start = len(MAGIC) + 4 + len(header)
+    start += -start % ALIGN
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        f.write(bytes(start - f.tell()))
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp, path)
+    return len(entries)
+
+
+class Bundle:
+    def __init__(self, mm, entries):
+        self.mm = mm
+        self.entries = entries
+
+    def surfaces(self):
+        # frombuffer не копирует пиксели: поверхность смотрит прямо в отображённый файл.
+        # Отображение ACCESS_COPY, так что случайная запись не испортит файл на диске
+        view = memoryview(self.mm)
+        for e in self.entries:
+            data = view[e["offset"]:e["offset"] + e["length"]]
+            surf = pg.image.frombuffer(data, (e["w"], e["h"]), "RGBA")
+            yield e["path"], tuple(e["size"]), e["angle"], surf
+
+
+def open_bundle(path=BUNDLE_PATH, base_dir="assets"):
+    # None - бандла нет, он повреждён или устарел; тогда Assets грузит PNG как раньше
+    try:
+        f = open(path, "rb")
+    except OSError:
+        return None
+    with f:
+        if f.read(len(MAGIC)) != MAGIC:
+            return None
+        try:
+            # Обрезанный файл, заголовок не того вида - всё это тот же "повреждён"
+            (n,) = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(n).decode("utf-8"))
+            sources = header["sources"]
+            entries = header["entries"]
+            if not isinstance(sources, dict) or not isinstance(entries, list):
+                return None
+            start = len(MAGIC) + 4 + n
+            start += -start % ALIGN
+            for e in entries:
+                if not isinstance(e["offset"], int) or not isinstance(e["length"], int):
+                    return None
+                e["offset"] += start
+        except (struct.error, KeyError, TypeError, ValueError):
+            return None
+
+        for rel_path, stamp in sources.items():
+            try:
+                if _source_stamp(os.path.join(base_dir, "images", rel_path)) != stamp:
+                    return None
+            except (OSError, TypeError):
+                return None
+
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        except (OSError, ValueError):
+            return None
+    if entries and entries[-1]["offset"] + entries[-1]["length"] > len(mm):
+        mm.close()
+        return None
+    return Bundle(mm, entries)
+
+
+def main():
+    n = bake()
+    print(f"baked {n} images into {BUNDLE_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,9 @@
 WIDTH, HEIGHT = 1280, 720
 FPS = 60
+# Симуляция идёт фиксированным шагом независимо от частоты кадров
+FIXED_TIMESTEP = True
+SIM_HZ = 120
+MAX_CATCHUP_STEPS = 8
 TITLE = "Space Shooter"
 
 PLAYER_SPEED = 460
@@ -14,8 +18,13 @@ BOOST_MULT = 1.45
 BULLET_SPEED_PLAYER = 1050
 BULLET_SPEED_ENEMY = 520
 PLAYER_FIRE_COOLDOWN = 0.12
+# "sprites" - пули как pg.sprite.Sprite, "numpy" - массивы NumPy (src/bullets.py)
+BULLET_ENGINE = "sprites"
+# Попадания по маскам (прозрачные углы босса и метеоров не считаются) и заметание быстрых пуль
+NARROWPHASE = True
 
-FORMATION_SPEED = 170
+# Скорость строя и интервал метеоров заданы по волнам в WAVES_FILE; множители - для подбора баланса
+FORMATION_SPEED_SCALE = 1.0
 FORMATION_DROP = 26
 FORMATION_MARGIN = 70
 
@@ -28,10 +37,55 @@ BOSS_ENTRY_Y = 110
 ENABLE_METEORS = True
 METEOR_SPEED_MIN = 220
 METEOR_SPEED_MAX = 560
-SPAWN_METEOR_BASE_MS = 1400
+METEOR_INTERVAL_SCALE = 1.0
 SPAWN_METEOR_MIN_MS = 520
 
 DROP_CHANCE = 0.22
 DROP_HP_WEIGHT = 0.45
 
 UI_MARGIN = 12
+
+# Кампания: построения, состав, скорости, метеоры и боссы по волнам (src/waves.py)
+WAVES_FILE = "assets/waves.json"
+
+# Перерисовка только изменившихся областей (pg.display.update(rects)).
+# Работает при неподвижном фоне: если фон прокручивается, кадр рисуется целиком.
+DIRTY_RECTS = False
+STARFIELD_SCROLL = True
+STAR_COUNT = 170
+
+# Мелкие спрайты упаковываются в один атлас (Assets.pack_atlas)
+ASSET_ATLAS = False
+# Запечённые картинки из assets/bundle.bin (python -m src.bundle); устаревший бандл игнорируется
+ASSET_BUNDLE = True
+# Общий кэш производных картинок (повороты, кадры взрыва): лимит памяти и кэш на диске в data/cache
+DERIVED_CACHE_MB = 32
+DERIVED_DISK_CACHE = False
+
+# Запись ввода каждой партии в data/replays (python -m src.playback <файл> - проиграть и сверить)
+REPLAY_RECORD = False
+REPLAY_DIR = "data/replays"
+# Через сколько тиков в повтор пишется контрольная сумма состояния
+REPLAY_CHECK_EVERY = 60
+
+# Рекорд и история партий: "json" (highscore.json + runs.jsonl) или "sqlite" (data/scores.db, WAL)
+STORAGE_BACKEND = "json"
+
+# Каналы микшера; пределы голосов и приоритеты звуков - audio.RULES
+AUDIO_CHANNELS = 16
+
+# Шрифт интерфейса: ищется в системе один раз, результат - в FONT_CACHE; иначе assets/fonts/freesansbold.ttf
+UI_FONT = "consolas"
+FONT_CACHE = "data/cache/fonts.json"
+
+# Телеметрия партий: сжатые JSONL в TELEMETRY_DIR, запись в фоне; при переполнении очереди события теряются
+TELEMETRY = True
+TELEMETRY_DIR = "data/telemetry"
+TELEMETRY_QUEUE = 4096
+TELEMETRY_FILE_MB = 4
+TELEMETRY_FILES = 20
+# Сколько кадров сводится в одно событие frames
+TELEMETRY_FRAME_WINDOW = 300
+
+# Профайлер кадров с оверлеем (F3 - вкл/выкл, F4 - сохранить буфер в data/)
+PROFILER = False
@@ -0,0 +1,59 @@
+import pygame as pg
+
+
+class Action:
+    __slots__ = ("move_x", "move_y", "fire", "boost", "pause", "menu", "quit")
+
+    def __init__(self, move_x=0, move_y=0, fire=False, boost=False, pause=False, menu=False, quit=False):
+        self.move_x = move_x
+        self.move_y = move_y
+        self.fire = fire
+        self.boost = boost
+        # pause/menu/quit - одноразовые события за тик, а не удерживаемые клавиши
+        self.pause = pause
+        self.menu = menu
+        self.quit = quit
+
+    def __repr__(self):
+        return (f"Action(move_x={self.move_x}, move_y={self.move_y}, fire={self.fire}, "
+                f"boost={self.boost}, pause={self.pause}, menu={self.menu}, quit={self.quit})")
+
+    def held(self):
+        # Копия без одноразовых событий - для повторных шагов симуляции в одном кадре
+        return Action(self.move_x, self.move_y, self.fire, self.boost)
+
+
+def read_action(on_key=None):
+    pause = menu = quit = False
+    for e in pg.event.get():
+        if e.type == pg.QUIT:
+            quit = True
+        elif e.type == pg.KEYDOWN:
+            if e.key == pg.K_ESCAPE:
+                menu = True
+            elif e.key == pg.K_p:
+                pause = not pause
+            elif on_key is not None:
+                # Служебные клавиши (F3/F4 и т.п.) не попадают в игровой ввод
+                on_key(e)
+
+    keys = pg.key.get_pressed()
+    move_x = move_y = 0
+    if keys[pg.K_w] or keys[pg.K_UP]:
+        move_y -= 1
+    if keys[pg.K_s] or keys[pg.K_DOWN]:
+        move_y += 1
+    if keys[pg.K_a] or keys[pg.K_LEFT]:
+        move_x -= 1
+    if keys[pg.K_d] or keys[pg.K_RIGHT]:
+        move_x += 1
+
+    return Action(
+        move_x=move_x,
+        move_y=move_y,
+        fire=bool(keys[pg.K_SPACE]),
+        boost=bool(keys[pg.K_LSHIFT] or keys[pg.K_RSHIFT]),
+        pause=pause,
+        menu=menu,
+        quit=quit,
+    )
@@ -0,0 +1,303 @@
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+import numpy as np
+import pygame as pg
+
+from .config import WIDTH, HEIGHT, SIM_HZ, BULLET_ENGINE, ASSET_BUNDLE
+from .assets import Assets
+from .bundle import open_bundle
+from .headless import init_headless
+from .replay import decode_action
+from .scenes import PlaySession
+
+# Среда в духе gym вокруг PlaySession: дискретные действия, наблюдения - массивы NumPy
+# фиксированной формы (лишние объекты отбрасываются, пустые строки - нули, число живых - в counts)
+
+# Действие = движение (0..8, троичная пара как в replay.encode_action) + 9 * огонь + 18 * ускорение
+ACTIONS = [decode_action(move | fire << 4 | boost << 5) for boost in (0, 1) for fire in (0, 1) for move in range(9)]
+
+LIMITS = {"enemies": 64, "bullets": 256, "meteors": 16, "pickups": 8}
+COUNTS = ("enemies", "bullets", "meteors", "pickups")
+
+
+def observation_spec(limits=LIMITS, frame_size=None):
+    spec = {
+        "player": ((5,), np.float32),                       # x, y, hp, energy, weapon_level
+        "boss": ((4,), np.float32),                         # x, y, hp, есть ли босс
+        "enemies": ((limits["enemies"], 5), np.float32),    # x, y, w, h, hp
+        "bullets": ((limits["bullets"], 4), np.float32),    # вражеские: x, y, vx, vy
+        "meteors": ((limits["meteors"], 5), np.float32),    # x, y, vx, vy, hp
+        "pickups": ((limits["pickups"], 3), np.float32),    # x, y, 1 - аптечка / 0 - модуль
+        "counts": ((len(COUNTS),), np.int32),
+    }
+    if frame_size is not None:
+        w, h = frame_size
+        spec["frame"] = ((h, w, 3), np.uint8)
+    return spec
+
+
+class ShooterEnv:
+    def __init__(self, assets=None, bullet_engine=BULLET_ENGINE, limits=LIMITS, frame_size=None, frame_skip=1,
+                 max_ticks=20000, dt=1.0 / SIM_HZ):
+        init_headless()
+        self.assets = assets if assets is not None else Assets(bundle=open_bundle() if ASSET_BUNDLE else None)
+        self.bullet_engine = bullet_engine
+        self.limits = limits
+        self.frame_size = frame_size
+        self.frame_skip = frame_skip
+        self.max_ticks = max_ticks
+        self.dt = dt
+
+        # Кадр рисуется в полный экран вне окна и уменьшается в frame_size только на последнем подшаге
+        self.screen = pg.Surface((WIDTH, HEIGHT)) if frame_size else None
+        self.frame = pg.Surface(frame_size) if frame_size else None
+        self.font = pg.font.Font(None, 22) if frame_size else None
+        self.big = pg.font.Font(None, 52) if frame_size else None
+
+        self.spec = observation_spec(limits, frame_size)
+        self.obs = {k: np.zeros(shape, dtype) for k, (shape, dtype) in self.spec.items()}
+        self.session = None
+        self.ticks = 0
+        self._score = 0
+
+    def bind(self, obs):
+        # Писать наблюдения прямо в чужие буферы (строки общего массива VectorEnv)
+        self.obs = obs
+
+    def reset(self, seed=None):
+        self.session = PlaySession(self.screen, self.assets, self.font, self.big, 0, present=False,
+                                   bullet_engine=self.bullet_engine, seed=seed)
+        self.ticks = 0
+        self._score = 0
+        if self.frame is not None:
+            self.session._draw()
+        self._observe()
+        return self.obs, {"seed": self.session.seed}
+
+    def step(self, action):
+        act = ACTIONS[action]
+        session = self.session
+        render = self.frame is not None
+        result = None
+        for i in range(self.frame_skip):
+            result = session.step(self.dt, act, render=render and i == self.frame_skip - 1)
+            self.ticks += 1
+            if result is not None:
+                break
+
+        # Награда - прирост очков за шаг; конец партии - terminated, лимит тиков - truncated
+        reward = session.score - self._score
+        self._score = session.score
+        terminated = result is not None
+        truncated = not terminated and self.ticks >= self.max_ticks
+        self._observe()
+        info = {"score": session.score, "wave": session.wave.wave_number - 1, "ticks": self.ticks,
+                "result": result[0] if terminated else None}
+        return self.obs, reward, terminated, truncated, info
+
+    def _observe(self):
+        s = self.session
+        obs = self.obs
+        counts = obs["counts"]
+        p = s.player
+        obs["player"][:] = (p.rect.centerx, p.rect.centery, p.hp, p.energy, p.weapon_level)
+
+        boss = obs["boss"]
+        boss[:] = 0
+        for b in s.bosses:
+            boss[:] = (b.rect.centerx, b.rect.centery, b.hp, 1)
+
+        # Строй хранит позиции и hp в массивах - копируются срезами, без обхода спрайтов
+        enemies = obs["enemies"]
+        enemies[:] = 0
+        c = s.wave.controller
+        n = 0
+        if c is not None:
+            idx = np.flatnonzero(c.alive[:c.n])[:len(enemies)]
+            n = len(idx)
+            w = c.w[idx]
+            h = c.h[idx]
+            enemies[:n, 0] = c.left[idx] + w // 2
+            enemies[:n, 1] = c.top[idx] + h // 2
+            enemies[:n, 2] = w
+            enemies[:n, 3] = h
+            enemies[:n, 4] = c.hp[idx]
+        counts[0] = n
+
+        bullets = obs["bullets"]
+        bullets[:] = 0
+        counts[1] = s.bullets.export("enemy", bullets)
+
+        meteors = obs["meteors"]
+        meteors[:] = 0
+        n = 0
+        for m in s.meteors:
+            if n == len(meteors):
+                break
+            meteors[n] = (m.rect.centerx, m.rect.centery, m.vx, m.vy, m.hp)
+            n += 1
+        counts[2] = n
+
+        pickups = obs["pickups"]
+        pickups[:] = 0
+        n = 0
+        for pk in s.pickups:
+            if n == len(pickups):
+                break
+            pickups[n] = (pk.rect.centerx, pk.rect.centery, pk.kind == "hp")
+            n += 1
+        counts[3] = n
+
+        if self.frame is not None:
+            pg.transform.scale(self.screen, self.frame_size, self.frame)
+            view = pg.surfarray.pixels3d(self.frame)
+            obs["frame"][:] = view.transpose(1, 0, 2)
+            del view
+
+
+class VectorEnv:
+    def __init__(self, num_envs, buffers=None, seed_stride=None, **env_kwargs):
+        # Все среды делят одни Assets; наблюдения складываются в общие массивы (num_envs, ...)
+        self.num_envs = num_envs
+        self.seed_stride = seed_stride or num_envs
+        env_kwargs = dict(env_kwargs)
+        first = ShooterEnv(**env_kwargs)
+        env_kwargs["assets"] = first.assets
+        self.envs = [first] + [ShooterEnv(**env_kwargs) for _ in range(num_envs - 1)]
+        self.spec = first.spec
+        if buffers is None:
+            buffers = {k: np.zeros((num_envs, *shape), dtype) for k, (shape, dtype) in self.spec.items()}
+            buffers["reward"] = np.zeros(num_envs, np.float32)
+            buffers["terminated"] = np.zeros(num_envs, bool)
+            buffers["truncated"] = np.zeros(num_envs, bool)
+        self.buffers = buffers
+        self.obs = {k: buffers[k] for k in self.spec}
+        for i, env in enumerate(self.envs):
+            env.bind({k: buf[i] for k, buf in self.obs.items()})
+        self._seeds = [None] * num_envs
+
+    def reset(self, seed=None):
+        infos = []
+        for i, env in enumerate(self.envs):
+            self._seeds[i] = seed + i if seed is not None else None
+            infos.append(env.reset(self._seeds[i])[1])
+        return self.obs, infos
+
+    def step(self, actions):
+        # Буферы наблюдений перезаписываются на каждом шаге; закончившаяся среда сразу
+        # начинает новую партию (seed + seed_stride), итог прошлой - в info
+        rewards = self.buffers["reward"]
+        terminated = self.buffers["terminated"]
+        truncated = self.buffers["truncated"]
+        infos = []
+        for i, (env, a) in enumerate(zip(self.envs, actions.tolist() if hasattr(actions, "tolist") else actions)):
+            _, rewards[i], terminated[i], truncated[i], info = env.step(a)
+            if terminated[i] or truncated[i]:
+                seed = self._seeds[i]
+                if seed is not None:
+                    seed += self.seed_stride
+                    self._seeds[i] = seed
+                info["final"] = True
+                # Слот наблюдения сейчас перезапишет reset - последнее наблюдение партии копируется
+                # в info (нужно для бутстрепа ценности на обрезанных эпизодах)
+                info["final_observation"] = {k: buf[i].copy() for k, buf in self.obs.items()}
+                env.reset(seed)
+            infos.append(info)
+        return self.obs, rewards, terminated, truncated, infos
+
+    def close(self):
+        pass
+
+
+def _worker(conn, layout, start, stop, num_envs, env_kwargs):
+    blocks = []
+    buffers = {}
+    for name, (shm_name, shape, dtype) in layout.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        blocks.append(shm)
+        buffers[name] = np.ndarray(shape, dtype, buffer=shm.buf)[start:stop]
+    venv = VectorEnv(stop - start, buffers=buffers, seed_stride=num_envs, **env_kwargs)
+    try:
+        while True:
+            cmd, arg = conn.recv()
+            if cmd == "step":
+                conn.send(venv.step(arg)[4])
+            elif cmd == "reset":
+                conn.send(venv.reset(arg)[1])
+            else:
+                break
+    finally:
+        del venv, buffers
+        for shm in blocks:
+            shm.close()
+        conn.close()
+
+
+class SubprocVectorEnv:
+    def __init__(self, num_envs, workers=None, **env_kwargs):
+        # Среды делятся на группы по процессам; наблюдения, награды и флаги лежат в общей
+        # памяти, по каналу идут только действия и info - копирования массивов нет
+        workers = min(num_envs, workers or mp.cpu_count() or 1)
+        self.num_envs = num_envs
+        self.spec = observation_spec(env_kwargs.get("limits", LIMITS), env_kwargs.get("frame_size"))
+        shapes = {k: ((num_envs, *shape), dtype) for k, (shape, dtype) in self.spec.items()}
+        shapes["reward"] = ((num_envs,), np.float32)
+        shapes["terminated"] = ((num_envs,), bool)
+        shapes["truncated"] = ((num_envs,), bool)
+
+        self._blocks = []
+        self.buffers = {}
+        layout = {}
+        for name, (shape, dtype) in shapes.items():
+            size = max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize)
+            shm = shared_memory.SharedMemory(create=True, size=size)
+            self._blocks.append(shm)
+            self.buffers[name] = np.ndarray(shape, dtype, buffer=shm.buf)
+            self.buffers[name][...] = 0
+            layout[name] = (shm.name, shape, dtype)
+        self.obs = {k: self.buffers[k] for k in self.spec}
+
+        self._bounds = np.linspace(0, num_envs, workers + 1).astype(int).tolist()
+        self._conns = []
+        self._procs = []
+        for start, stop in zip(self._bounds, self._bounds[1:]):
+            parent, child = mp.Pipe()
+            proc = mp.Process(target=_worker, args=(child, layout, start, stop, num_envs, env_kwargs), daemon=True)
+            proc.start()
+            child.close()
+            self._conns.append(parent)
+            self._procs.append(proc)
+
+    def reset(self, seed=None):
+        for conn, start in zip(self._conns, self._bounds):
+            conn.send(("reset", seed + start if seed is not None else None))
+        infos = []
+        for conn in self._conns:
+            infos.extend(conn.recv())
+        return self.obs, infos
+
+    def step(self, actions):
+        actions = np.asarray(actions)
+        # Сначала раздаём действия всем процессам, потом собираем ответы - группы шагают параллельно
+        for conn, start, stop in zip(self._conns, self._bounds, self._bounds[1:]):
+            conn.send(("step", actions[start:stop]))
+        infos = []
+        for conn in self._conns:
+            infos.extend(conn.recv())
+        b = self.buffers
+        return self.obs, b["reward"], b["terminated"], b["truncated"], infos
+
+    def close(self):
+        for conn in self._conns:
+            try:
+                conn.send(("close", None))
+            except (BrokenPipeError, OSError):
+                pass
+        for proc in self._procs:
+            proc.join(timeout=5)
+        self.obs = self.buffers = None
+        for shm in self._blocks:
+            shm.close()
+            shm.unlink()
+        self._blocks = []
@@ -0,0 +1,78 @@
+import io
+import json
+import os
+import sys
+
+import pygame as pg
+
+from .config import UI_FONT, FONT_CACHE
+
+# Шрифт ищется в системе один раз: pg.font.SysFont на Linux при первом вызове опрашивает
+# fontconfig по всем шрифтам машины. Найденный путь (или "не найден") запоминается в
+# FONT_CACHE, при следующих запусках системный поиск не выполняется. Если шрифта нет -
+# используется шрифт из assets/fonts, поэтому интерфейс одинаков на любой машине
+
+FONT_DIR = os.path.join("assets", "fonts")
+FALLBACK = os.path.join(FONT_DIR, "freesansbold.ttf")
+
+
+def _load_cache(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    # Файл чужой формы считается пустым кэшем, как и нечитаемый
+    if not isinstance(data, dict) or not isinstance(data.get("fonts", {}), dict):
+        return {}
+    return data if data.get("platform") == sys.platform else {}
+
+
+def _save_cache(path, data):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def resolve(name, cache_path=FONT_CACHE):
+    # Порядок: файл в assets/fonts, запомненный путь, системный поиск (один раз), запасной шрифт
+    bundled = os.path.join(FONT_DIR, f"{name}.ttf")
+    if os.path.exists(bundled):
+        return bundled
+
+    cache = _load_cache(cache_path) if cache_path else {}
+    fonts = cache.get("fonts", {})
+    if name in fonts:
+        path = fonts[name]
+        if path is None or isinstance(path, str) and os.path.exists(path):
+            return path or FALLBACK
+
+    path = pg.font.match_font(name)
+    if cache_path:
+        fonts[name] = path
+        try:
+            _save_cache(cache_path, {"platform": sys.platform, "fonts": fonts})
+        except OSError:
+            pass
+    return path or FALLBACK
+
+
+class Fonts:
+    def __init__(self, name=UI_FONT, cache_path=FONT_CACHE):
+        self.name = name
+        self.path = resolve(name, cache_path)
+        self._data = None
+        self._sizes = {}
+
+    def get(self, size):
+        # Файл читается один раз; шрифт нужного размера собирается из этих байтов при первом запросе
+        font = self._sizes.get(size)
+        if font is None:
+            if self._data is None:
+                with open(self.path, "rb") as f:
+                    self._data = f.read()
+            font = pg.font.Font(io.BytesIO(self._data), size)
+            self._sizes[size] = font
+        return font
@@ -0,0 +1,164 @@
+import argparse
+import os
+import time
+
+import pygame as pg
+
+from .config import WIDTH, HEIGHT, SIM_HZ, BULLET_ENGINE, ASSET_BUNDLE
+from .controls import Action
+from .assets import Assets
+from .bundle import open_bundle
+from .scenes import PlaySession
+from .profiler import FrameProfiler
+from .replay import Recorder
+
+
+def init_headless():
+    # SDL читает драйверы при инициализации, поэтому выставляем их до pg.init()
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    pg.init()
+
+
+def idle_policy(session, tick):
+    return Action()
+
+
+def autofire_policy(session, tick):
+    # Простейший бот: держит огонь и тянется к ближайшему по X противнику
+    player = session.player
+    targets = list(session.enemies) or list(session.bosses)
+    move_x = 0
+    if targets:
+        target = min(targets, key=lambda s: abs(s.rect.centerx - player.rect.centerx))
+        if target.rect.centerx < player.rect.centerx - 8:
+            move_x = -1
+        elif target.rect.centerx > player.rect.centerx + 8:
+            move_x = 1
+    return Action(move_x=move_x, fire=True)
+
+
+POLICIES = {
+    "idle": idle_policy,
+    "autofire": autofire_policy,
+}
+
+
+class HeadlessRunner:
+    def __init__(self, seed=None, dt=1.0 / SIM_HZ, policy=autofire_policy, render=False, restart=True,
+                 bullet_engine=BULLET_ENGINE, profiler=None, setup=None, record_dir=None):
+        init_headless()
+        self.seed = seed
+        self.dt = dt
+        self.policy = policy
+        self.render = render
+        self.restart = restart
+        self.bullet_engine = bullet_engine
+        self.profiler = profiler
+        self.setup = setup
+        # Каталог для повторов: каждая сессия пишется в session-<n>.rpl
+        self.record_dir = record_dir
+
+        self.assets = Assets(bundle=open_bundle() if ASSET_BUNDLE else None)
+        self.screen = pg.Surface((WIDTH, HEIGHT)) if render else None
+        self.font = pg.font.Font(None, 22) if render else None
+        self.big = pg.font.Font(None, 52) if render else None
+
+        self.session = None
+        self.results = []
+
+    def new_session(self):
+        seed = self.seed + len(self.results) if self.seed is not None else None
+        self.session = PlaySession(self.screen, self.assets, self.font, self.big, 0, present=False,
+                                   bullet_engine=self.bullet_engine, seed=seed)
+        self.session.profiler = self.profiler
+        if self.setup is not None:
+            self.setup(self.session)
+        if self.record_dir is not None:
+            Recorder().attach(self.session)
+        return self.session
+
+    def run(self, ticks):
+        if self.session is None:
+            self.new_session()
+
+        start = time.perf_counter()
+        done = 0
+        session_ticks = 0
+        prof = self.profiler
+        while done < ticks:
+            if prof is not None:
+                prof.begin()
+            action = self.policy(self.session, session_ticks)
+            result = self.session.step(self.dt, action, render=self.render)
+            if prof is not None:
+                prof.end(*self.session.profile_counts())
+            done += 1
+            session_ticks += 1
+            if result is not None:
+                if self.session.recorder is not None:
+                    replay = self.session.recorder.finish(self.session, result)
+                    replay.save(os.path.join(self.record_dir, f"session-{len(self.results) + 1}.rpl"))
+                mode, score = result
+                self.results.append({
+                    "result": mode,
+                    "score": score,
+                    "wave": self.session.wave.wave_number - 1,
+                    "ticks": session_ticks,
+                })
+                if not self.restart:
+                    break
+                self.new_session()
+                session_ticks = 0
+        elapsed = time.perf_counter() - start
+
+        return {
+            "ticks": done,
+            "elapsed": elapsed,
+            "ticks_per_sec": done / elapsed if elapsed > 0 else 0.0,
+            "sessions": self.results,
+            "pools": self.session.pools.stats(),
+            "text": self.session.text.stats(),
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run PlaySession without a display")
+    parser.add_argument("--ticks", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--dt", type=float, default=1.0 / SIM_HZ)
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="autofire")
+    parser.add_argument("--render", action="store_true", help="draw every tick into an off-screen surface")
+    parser.add_argument("--bullets", choices=["sprites", "numpy"], default=BULLET_ENGINE)
+    parser.add_argument("--profile", metavar="PATH", help="record per-phase timings and dump them to .json or .csv")
+    parser.add_argument("--no-restart", action="store_true", help="stop when the first session ends")
+    parser.add_argument("--record", metavar="DIR", help="save every finished session as a replay (python -m src.playback)")
+    args = parser.parse_args(argv)
+
+    runner = HeadlessRunner(
+        seed=args.seed,
+        dt=args.dt,
+        policy=POLICIES[args.policy],
+        render=args.render,
+        restart=not args.no_restart,
+        bullet_engine=args.bullets,
+        profiler=FrameProfiler(capacity=max(1, args.ticks)) if args.profile else None,
+        record_dir=args.record,
+    )
+    stats = runner.run(args.ticks)
+
+    for i, r in enumerate(stats["sessions"]):
+        print(f"session {i + 1}: {r['result']} score={r['score']} wave={r['wave']} ticks={r['ticks']}")
+    for name, p in stats["pools"].items():
+        print(f"pool {name}: live={p['live']} free={p['free']} hits={p['hits']} allocations={p['allocations']}")
+    if args.render:
+        t = stats["text"]
+        print(f"text cache: size={t['size']} hits={t['hits']} misses={t['misses']} hit_rate={t['hit_rate']:.3f}")
+    if runner.profiler is not None:
+        p = runner.profiler.percentiles()
+        print(f"tick time p50={p[50]:.3f}ms p95={p[95]:.3f}ms p99={p[99]:.3f}ms -> {runner.profiler.dump(args.profile)}")
+    print(f"{stats['ticks']} ticks in {stats['elapsed']:.2f}s - {stats['ticks_per_sec']:.0f} ticks/sec")
+
+
+if __name__ == "__main__":
+    main()
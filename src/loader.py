@@ -0,0 +1,91 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame as pg
+
+from .bundle import BAKE_SPECS
+
+SOUNDS = (
+    "button_press.wav", "splash.wav", "gamelose.wav", "gamewin.wav",
+    "explosion.wav", "pick_hp.wav", "pick_module.wav", "bosscoming.wav",
+    "shoot.wav", "hit.wav",
+)
+
+
+def _decode_image(path, size, angle):
+    # Декодирование и масштаб - в рабочем потоке (pygame отпускает GIL); convert здесь нельзя
+    surf = pg.image.load(path)
+    if size is not None:
+        surf = pg.transform.smoothscale(surf, size)
+    if angle:
+        surf = pg.transform.rotate(surf, angle)
+    return surf
+
+
+class AssetLoader:
+    def __init__(self, assets, workers=None):
+        self.assets = assets
+        self.pool = ThreadPoolExecutor(max_workers=workers or min(4, os.cpu_count() or 1), thread_name_prefix="assets")
+        self.pending = []
+        self.total = 0
+        self.loaded = 0
+        self.errors = []
+
+    def submit(self, images=BAKE_SPECS, sounds=SOUNDS):
+        assets = self.assets
+        for rel_path, size, angle in images:
+            path = assets._path("images", rel_path)
+            # Уже в кэше (бандл) или файла нет - плейсхолдер нарисует сам Assets.image
+            if assets.cached(rel_path, size, angle) or not os.path.exists(path):
+                continue
+            fut = self.pool.submit(_decode_image, path, size, angle)
+            self.pending.append((fut, "image", (rel_path, size, angle)))
+        if pg.mixer.get_init():
+            for rel_path in sounds:
+                path = assets._path("sounds", rel_path)
+                # Звук, уже загруженный синхронно (щелчок кнопки), второй раз не грузится
+                if rel_path in assets._snd_cache or not os.path.exists(path):
+                    continue
+                fut = self.pool.submit(pg.mixer.Sound, path)
+                self.pending.append((fut, "sound", rel_path))
+        self.total = self.loaded + len(self.pending)
+
+    @property
+    def done(self):
+        return not self.pending
+
+    @property
+    def progress(self):
+        return self.loaded / self.total if self.total else 1.0
+
+    def poll(self):
+        # Вызывается из главного потока раз в кадр: забирает готовое и кладёт в кэши Assets
+        still = []
+        for item in self.pending:
+            fut, kind, key = item
+            if not fut.done():
+                still.append(item)
+                continue
+            self.loaded += 1
+            try:
+                result = fut.result()
+            except Exception as e:
+                # Битый или обрезанный файл не валит загрузку, какой бы ни была ошибка декодера:
+                # Assets позже попробует сам или отдаст плейсхолдер
+                self.errors.append((key, e))
+                continue
+            if kind == "image":
+                rel_path, size, angle = key
+                self.assets.store(rel_path, size, result, angle)
+            else:
+                self.assets.store_sound(key, result)
+        self.pending = still
+        return self.progress
+
+    def wait(self):
+        for fut, _, _ in self.pending:
+            fut.exception()
+        return self.poll()
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
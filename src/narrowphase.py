@@ -0,0 +1,29 @@
+import math
+
+import pygame as pg
+
+# Точная проверка после прямоугольного broadphase: маски берутся из Assets.mask,
+# то есть считаются один раз на картинку, а не на каждый спрайт
+
+collide_mask = pg.sprite.collide_mask
+
+
+def swept_overlap(mask, left, top, bmask, x0, y0, x1, y1):
+    # Пуля летит из (x0, y0) в (x1, y1) (левый верхний угол). Шаг выборки - не больше
+    # меньшей стороны пули, так что тонкую цель между тиками она не перескочит.
+    # Начальная точка уже проверялась на прошлом тике как конечная, поэтому t=0 пропускаем
+    dx = x1 - x0
+    dy = y1 - y0
+    bw, bh = bmask.get_size()
+    steps = max(1, math.ceil(max(abs(dx), abs(dy)) / max(1, min(bw, bh))))
+    for i in range(steps, 0, -1):
+        t = i / steps
+        if mask.overlap(bmask, (round(x0 + dx * t) - left, round(y0 + dy * t) - top)):
+            return True
+    return False
+
+
+def swept_collide(target, bullet):
+    r = target.rect
+    b = bullet.rect
+    return swept_overlap(target.mask, r.x, r.y, bullet.mask, bullet.px, bullet.py, b.x, b.y)
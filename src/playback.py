@@ -0,0 +1,116 @@
+import argparse
+import os
+import sys
+import time
+
+import pygame as pg
+
+from .config import WIDTH, HEIGHT, ASSET_BUNDLE
+from .assets import Assets
+from .bundle import open_bundle
+from .headless import init_headless
+from .replay import Replay, ReplayDesync
+from .scenes import PlaySession
+from .profiler import FrameProfiler
+
+
+class ReplayPlayer:
+    def __init__(self, replay, assets, screen=None, font=None, big_font=None, present=False, profiler=None):
+        self.replay = replay
+        self.session = PlaySession(screen, assets, font, big_font, 0, present=present,
+                                   bullet_engine=replay.bullet_engine, seed=replay.seed)
+        self.session.precise = replay.precise
+        self.session.profiler = profiler
+        self.profiler = profiler
+        self.checks = dict(replay.checks)
+        self.tick = 0
+        self.verified = 0
+        self.result = None
+
+    def _verify(self):
+        expected = self.checks.get(self.tick)
+        if expected is None:
+            return
+        actual = self.session.checksum()
+        if actual != expected:
+            raise ReplayDesync(self.tick, expected, actual)
+        self.verified += 1
+
+    def run(self, render=False, speed=0.0, verify=True):
+        # speed - множитель реального времени (1.0 - как играли); 0 - без ожидания
+        session = self.session
+        prof = self.profiler
+        start = time.perf_counter()
+        sim_time = 0.0
+        for dt, action in self.replay.actions():
+            if verify:
+                self._verify()
+            if prof is not None:
+                prof.begin()
+            result = session.step(dt, action, render=render)
+            if prof is not None:
+                prof.end(*session.profile_counts())
+            self.tick += 1
+            if result is not None:
+                self.result = result
+                break
+            if speed > 0:
+                sim_time += dt
+                wait = start + sim_time / speed - time.perf_counter()
+                if wait > 0:
+                    time.sleep(wait)
+                pg.event.pump()
+        if verify:
+            self._verify()
+        return self.result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play back a recorded session and verify state checksums")
+    parser.add_argument("path")
+    parser.add_argument("--render", action="store_true", help="draw every tick into an off-screen surface")
+    parser.add_argument("--window", action="store_true", help="show the playback in a window")
+    parser.add_argument("--speed", type=float, default=None, help="playback speed (1.0 - real time, 0 - unlimited)")
+    parser.add_argument("--profile", metavar="PATH", help="record per-phase timings and dump them to .json or .csv")
+    parser.add_argument("--no-verify", action="store_true")
+    args = parser.parse_args(argv)
+
+    replay = Replay.load(args.path)
+    if args.window:
+        pg.init()
+        screen = pg.display.set_mode((WIDTH, HEIGHT))
+        pg.display.set_caption(os.path.basename(args.path))
+    else:
+        init_headless()
+        screen = pg.Surface((WIDTH, HEIGHT)) if args.render else None
+    render = args.window or args.render
+    speed = args.speed if args.speed is not None else (1.0 if args.window else 0.0)
+    font = pg.font.Font(None, 22) if render else None
+    big = pg.font.Font(None, 52) if render else None
+
+    player = ReplayPlayer(replay, Assets(bundle=open_bundle() if ASSET_BUNDLE else None), screen, font, big,
+                          present=args.window,
+                          profiler=FrameProfiler(capacity=max(1, replay.ticks)) if args.profile else None)
+    print(f"{args.path}: {replay.ticks} ticks, seed={replay.seed} bullets={replay.bullet_engine} "
+          f"precise={replay.precise}")
+    start = time.perf_counter()
+    try:
+        result = player.run(render=render, speed=speed, verify=not args.no_verify)
+    except ReplayDesync as e:
+        print(f"DESYNC: {e}")
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
+
+    print(f"result: {result} (recorded {replay.result})")
+    if not args.no_verify:
+        print(f"checksums: {player.verified}/{len(replay.checks)} ok")
+    if player.profiler is not None:
+        p = player.profiler.percentiles()
+        print(f"tick time p50={p[50]:.3f}ms p95={p[95]:.3f}ms p99={p[99]:.3f}ms -> {player.profiler.dump(args.profile)}")
+    print(f"{player.tick} ticks in {elapsed:.2f}s - {player.tick / elapsed if elapsed > 0 else 0.0:.0f} ticks/sec")
+    if result != replay.result:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import pygame as pg
+
+
+class Poolable(pg.sprite.Sprite):
+    pool = None
+    in_pool = False
+    generation = 0
+
+    def kill(self):
+        super().kill()
+        if self.pool is not None:
+            self.pool.release(self)
+
+
+class SpritePool:
+    def __init__(self, factory):
+        self.factory = factory
+        self.free = []
+        self.live = 0
+        self.hits = 0
+        self.allocations = 0
+        self.releases = 0
+
+    def acquire(self, groups, *args, **kwargs):
+        if self.free:
+            obj = self.free.pop()
+            obj.in_pool = False
+            obj.reset(*args, **kwargs)
+            self.hits += 1
+        else:
+            obj = self.factory(*args, **kwargs)
+            obj.pool = self
+            self.allocations += 1
+        obj.add(*groups)
+        self.live += 1
+        return obj
+
+    def release(self, obj):
+        # kill() может прийти повторно (например, из update и из коллизий в одном тике)
+        if obj.in_pool:
+            return
+        obj.in_pool = True
+        obj.generation += 1
+        self.free.append(obj)
+        self.live -= 1
+        self.releases += 1
+
+    def stats(self):
+        return {
+            "live": self.live,
+            "free": len(self.free),
+            "hits": self.hits,
+            "allocations": self.allocations,
+            "releases": self.releases,
+        }
+
+
+class SpritePools:
+    def __init__(self, **factories):
+        self._pools = {name: SpritePool(factory) for name, factory in factories.items()}
+
+    def __getitem__(self, name):
+        return self._pools[name]
+
+    def stats(self):
+        return {name: pool.stats() for name, pool in self._pools.items()}
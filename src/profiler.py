@@ -0,0 +1,127 @@
+import csv
+import gc
+import json
+import os
+import time
+
+import numpy as np
+import pygame as pg
+
+PHASES = ("input", "player", "update", "fire", "spawn", "collide", "draw", "present")
+COUNTS = ("sprites", "enemies", "bosses", "meteors", "pickups", "fx", "bullets_player", "bullets_enemy")
+
+
+class FrameProfiler:
+    def __init__(self, capacity=1200):
+        self.capacity = capacity
+        self.overlay = False
+        self.frame_ms = np.zeros(capacity)
+        self.phase_ms = np.zeros((capacity, len(PHASES)))
+        self.counts = np.zeros((capacity, len(COUNTS)), dtype=np.int32)
+        self.allocs = np.zeros(capacity, dtype=np.int32)
+        self.gcs = np.zeros(capacity, dtype=np.int32)
+        self.frames = 0
+
+        self._phase_index = {name: i for i, name in enumerate(PHASES)}
+        self._row = np.zeros(len(PHASES))
+        self._t0 = 0.0
+        self._t = 0.0
+        self._last_allocs = None
+        self._last_gcs = self._gc_total()
+
+    @staticmethod
+    def _gc_total():
+        return sum(s["collections"] for s in gc.get_stats())
+
+    def begin(self):
+        self._row[:] = 0.0
+        self._t0 = self._t = time.perf_counter()
+
+    def lap(self, phase):
+        now = time.perf_counter()
+        self._row[self._phase_index[phase]] += (now - self._t) * 1000.0
+        self._t = now
+
+    def end(self, counts=None, allocations=None):
+        i = self.frames % self.capacity
+        self.frame_ms[i] = (time.perf_counter() - self._t0) * 1000.0
+        self.phase_ms[i] = self._row
+        if counts is not None:
+            self.counts[i] = counts
+        if allocations is not None:
+            last = allocations if self._last_allocs is None else self._last_allocs
+            self.allocs[i] = allocations - last
+            self._last_allocs = allocations
+        gcs = self._gc_total()
+        self.gcs[i] = gcs - self._last_gcs
+        self._last_gcs = gcs
+        self.frames += 1
+
+    def _order(self):
+        # Индексы кольцевого буфера от самого старого кадра к самому новому
+        n = min(self.frames, self.capacity)
+        start = self.frames - n
+        return (np.arange(start, self.frames) % self.capacity) if n else np.arange(0)
+
+    def percentiles(self, qs=(50, 95, 99)):
+        idx = self._order()
+        if not len(idx):
+            return {q: 0.0 for q in qs}
+        values = np.percentile(self.frame_ms[idx], qs)
+        return dict(zip(qs, values.tolist()))
+
+    def rows(self):
+        for i in self._order().tolist():
+            row = {"frame_ms": float(self.frame_ms[i])}
+            row.update(zip(PHASES, self.phase_ms[i].tolist()))
+            row.update(zip(COUNTS, self.counts[i].tolist()))
+            row["allocations"] = int(self.allocs[i])
+            row["gc_collections"] = int(self.gcs[i])
+            yield row
+
+    def dump(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        rows = list(self.rows())
+        if path.endswith(".csv"):
+            fields = ["frame_ms", *PHASES, *COUNTS, "allocations", "gc_collections"]
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                w = csv.DictWriter(f, fieldnames=fields)
+                w.writeheader()
+                w.writerows(rows)
+        else:
+            p = self.percentiles()
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({
+                    "frames": self.frames,
+                    "p50": p[50],
+                    "p95": p[95],
+                    "p99": p[99],
+                    "rows": rows,
+                }, f, ensure_ascii=False)
+        return path
+
+    def draw_overlay(self, surface, font, width=300, height=70):
+        sw, _ = surface.get_size()
+        box = pg.Rect(sw - width - 12, 44, width, height + 28)
+        clip = surface.get_clip()
+        surface.set_clip(box)
+        pg.draw.rect(surface, (0, 0, 0), box)
+        pg.draw.rect(surface, (90, 90, 110), box, 1)
+
+        p = self.percentiles()
+        t = font.render(f"p50 {p[50]:.1f}  p95 {p[95]:.1f}  p99 {p[99]:.1f} ms", True, (200, 255, 200))
+        surface.blit(t, (box.x + 6, box.y + 4))
+
+        graph = pg.Rect(box.x + 6, box.y + 24, width - 12, height)
+        # Линия бюджета кадра 60 FPS; шкала графика - 0..33 мс
+        scale = graph.height / 33.3
+        y_budget = graph.bottom - int(16.7 * scale)
+        pg.draw.line(surface, (120, 60, 60), (graph.left, y_budget), (graph.right, y_budget))
+
+        idx = self._order()[-graph.width:]
+        if len(idx) > 1:
+            ys = np.clip(graph.bottom - self.frame_ms[idx] * scale, graph.top, graph.bottom).astype(np.int32)
+            xs = graph.left + np.arange(len(ys))
+            pg.draw.lines(surface, (120, 220, 255), False, list(zip(xs.tolist(), ys.tolist())))
+        surface.set_clip(clip)
+        return box
@@ -0,0 +1,49 @@
+class DirtyRenderer:
+    def __init__(self, screen, build_background):
+        self.screen = screen
+        self.build_background = build_background
+        self.background = None
+        self.full = True
+        self._bullet_rects = []
+        self._hud_rects = []
+        self._hud_state = None
+
+    def invalidate(self):
+        # Следующий кадр перерисовывается целиком (после паузы, смены фона и т.п.)
+        self.full = True
+
+    def frame(self, sprites, bullets, draw_hud, hud_state, lag=0.0):
+        screen = self.screen
+        if self.background is None:
+            self.background = self.build_background()
+            self.full = True
+        bg = self.background
+
+        if self.full:
+            screen.blit(bg, (0, 0))
+        else:
+            sprites.clear(screen, bg)
+            # HUD стираем каждый кадр, иначе полупрозрачный текст "накапливается" при повторном выводе
+            for r in self._bullet_rects:
+                screen.blit(bg, r, r)
+            for r in self._hud_rects:
+                screen.blit(bg, r, r)
+
+        dirty = sprites.draw(screen)
+        bullet_rects = bullets.draw(screen, rects=True, lag=lag)
+        hud_rects = draw_hud()
+
+        if self.full:
+            self.full = False
+            dirty = None
+        else:
+            dirty.extend(self._bullet_rects)
+            dirty.extend(bullet_rects)
+            if hud_state != self._hud_state:
+                dirty.extend(self._hud_rects)
+                dirty.extend(hud_rects)
+
+        self._bullet_rects = bullet_rects
+        self._hud_rects = hud_rects
+        self._hud_state = hud_state
+        return dirty
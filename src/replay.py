@@ -0,0 +1,193 @@
+import os
+import struct
+import zlib
+
+from .config import REPLAY_CHECK_EVERY
+from .controls import Action
+
+# Файл повтора: заголовок (seed сессии, движок пуль, режим коллизий), затем сжатое тело:
+# ввод по тикам серийными отрезками (код действия, dt, число тиков), контрольные суммы
+# состояния через каждые check_every тиков и итог партии
+
+MAGIC = b"SSRP"
+VERSION = 1
+_HEADER = struct.Struct("<4sHqH?B")
+_F64 = struct.Struct("<d")
+_U32 = struct.Struct("<I")
+
+
+class ReplayDesync(Exception):
+    def __init__(self, tick, expected, actual):
+        super().__init__(f"state diverged at tick {tick}: checksum {actual:08x}, recorded {expected:08x}")
+        self.tick = tick
+        self.expected = expected
+        self.actual = actual
+
+
+def encode_action(a):
+    # Движение - одна троичная пара (0..8) в младших битах, дальше флаги
+    move = (a.move_x + 1) * 3 + (a.move_y + 1)
+    return move | a.fire << 4 | a.boost << 5 | a.pause << 6 | a.menu << 7 | a.quit << 8
+
+
+def decode_action(code):
+    move = code & 15
+    return Action(move // 3 - 1, move % 3 - 1, bool(code & 16), bool(code & 32),
+                  bool(code & 64), bool(code & 128), bool(code & 256))
+
+
+def _put_varint(out, n):
+    while n >= 0x80:
+        out.append(n & 0x7F | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _get_varint(buf, pos):
+    n = shift = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        n |= (b & 0x7F) << shift
+        if b < 0x80:
+            return n, pos
+        shift += 7
+
+
+def _put_str(out, s):
+    data = s.encode("utf-8")
+    _put_varint(out, len(data))
+    out += data
+
+
+def _get_str(buf, pos):
+    n, pos = _get_varint(buf, pos)
+    return bytes(buf[pos:pos + n]).decode("utf-8"), pos + n
+
+
+class Replay:
+    def __init__(self, seed, bullet_engine, precise, check_every=REPLAY_CHECK_EVERY, runs=(), checks=(), result=None):
+        self.seed = seed
+        self.bullet_engine = bullet_engine
+        self.precise = precise
+        self.check_every = check_every
+        # runs - [код действия, dt, число тиков подряд]; checks - (тик, сумма) до этого тика
+        self.runs = [list(r) for r in runs]
+        self.checks = list(checks)
+        self.result = result
+
+    @property
+    def ticks(self):
+        return sum(r[2] for r in self.runs)
+
+    def actions(self):
+        for code, dt, count in self.runs:
+            action = decode_action(code)
+            for _ in range(count):
+                yield dt, action
+
+    def encode(self):
+        body = bytearray()
+        _put_varint(body, len(self.runs))
+        dt = None
+        for code, run_dt, count in self.runs:
+            # Младший бит - "дальше новый dt"; при фиксированном шаге dt пишется один раз
+            _put_varint(body, code << 1 | (run_dt != dt))
+            _put_varint(body, count)
+            if run_dt != dt:
+                body += _F64.pack(run_dt)
+                dt = run_dt
+        _put_varint(body, len(self.checks))
+        prev = 0
+        for tick, crc in self.checks:
+            _put_varint(body, tick - prev)
+            body += _U32.pack(crc)
+            prev = tick
+        mode, score = self.result if self.result is not None else ("", 0)
+        _put_str(body, mode)
+        _put_varint(body, score)
+
+        engine = self.bullet_engine.encode("ascii")
+        head = _HEADER.pack(MAGIC, VERSION, self.seed, self.check_every, self.precise, len(engine)) + engine
+        return head + zlib.compress(bytes(body), 9)
+
+    @classmethod
+    def decode(cls, data):
+        magic, version, seed, check_every, precise, n = _HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not a replay file or unsupported version")
+        pos = _HEADER.size
+        bullet_engine = data[pos:pos + n].decode("ascii")
+        body = zlib.decompress(data[pos + n:])
+
+        pos = 0
+        count, pos = _get_varint(body, pos)
+        runs = []
+        dt = 0.0
+        for _ in range(count):
+            head, pos = _get_varint(body, pos)
+            ticks, pos = _get_varint(body, pos)
+            if head & 1:
+                dt, = _F64.unpack_from(body, pos)
+                pos += _F64.size
+            runs.append([head >> 1, dt, ticks])
+        count, pos = _get_varint(body, pos)
+        checks = []
+        tick = 0
+        for _ in range(count):
+            delta, pos = _get_varint(body, pos)
+            tick += delta
+            checks.append((tick, _U32.unpack_from(body, pos)[0]))
+            pos += _U32.size
+        mode, pos = _get_str(body, pos)
+        score, pos = _get_varint(body, pos)
+        return cls(seed, bullet_engine, precise, check_every, runs, checks, (mode, score) if mode else None)
+
+    def save(self, path):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(self.encode())
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.decode(f.read())
+
+
+class Recorder:
+    def __init__(self, check_every=REPLAY_CHECK_EVERY):
+        self.check_every = check_every
+        self.replay = None
+        self.ticks = 0
+
+    def attach(self, session):
+        self.replay = Replay(session.seed, session.bullet_engine, session.precise, self.check_every)
+        self.ticks = 0
+        session.recorder = self
+        return self
+
+    def record(self, session, dt, action):
+        # Зовётся из PlaySession.step до применения ввода: сумма - состояние после прошлых тиков
+        replay = self.replay
+        if self.ticks % self.check_every == 0:
+            replay.checks.append((self.ticks, session.checksum()))
+        code = encode_action(action)
+        runs = replay.runs
+        if runs and runs[-1][0] == code and runs[-1][1] == dt:
+            runs[-1][2] += 1
+        else:
+            runs.append([code, dt, 1])
+        self.ticks += 1
+
+    def finish(self, session, result=None):
+        replay = self.replay
+        if not replay.checks or replay.checks[-1][0] != self.ticks:
+            replay.checks.append((self.ticks, session.checksum()))
+        replay.result = result
+        session.recorder = None
+        return replay
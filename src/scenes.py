@@ -1,18 +1,43 @@
 import os
 import random
+import time
+import zlib
+
+import numpy as np
 import pygame as pg
 
 from .config import (
     WIDTH, HEIGHT, FPS, TITLE,
+    FIXED_TIMESTEP, SIM_HZ, MAX_CATCHUP_STEPS, PROFILER,
     UI_MARGIN,
     ENERGY_MAX,
-    FORMATION_SPEED, FORMATION_DROP, FORMATION_MARGIN,
-    ENABLE_METEORS, SPAWN_METEOR_BASE_MS, SPAWN_METEOR_MIN_MS,
+    FORMATION_SPEED_SCALE, FORMATION_DROP, FORMATION_MARGIN,
+    ENABLE_METEORS, METEOR_INTERVAL_SCALE, SPAWN_METEOR_MIN_MS,
     DROP_CHANCE, DROP_HP_WEIGHT,
+    BULLET_ENGINE,
+    DIRTY_RECTS, STARFIELD_SCROLL, STAR_COUNT, ASSET_ATLAS, ASSET_BUNDLE, NARROWPHASE,
+    REPLAY_RECORD, REPLAY_DIR, STORAGE_BACKEND, TELEMETRY, TELEMETRY_FRAME_WINDOW,
 )
 from .assets import Assets
-from .storage import load_highscore, save_highscore
-from .sprites import Player, Meteor, Explosion, FormationController, FormationEnemy, Boss, Pickup
+from .bundle import open_bundle
+from .loader import AssetLoader
+from .storage import open_store, make_run, ScoreWriter
+from .controls import read_action
+from .broadphase import SpatialHash
+from .sprites import Player, Bullet, Meteor, Explosion, FormationController, FormationEnemy, Boss, Pickup
+from .pool import SpritePools
+from .bullets import make_bullet_engine
+from .narrowphase import collide_mask
+from .render import DirtyRenderer
+from .text import TextCache
+from .fonts import Fonts
+from .audio import Audio
+from .telemetry import Telemetry, frame_summary
+from .timestep import FixedTimestep
+from .scheduler import Scheduler
+from .profiler import FrameProfiler
+from .replay import Recorder
+from .waves import load as load_campaign
 
 
 def draw_bar(surface, x, y, w, h, value01):
@@ -23,26 +48,51 @@ def draw_bar(surface, x, y, w, h, value01):
 
 
 class Starfield:
-    def __init__(self, count=170):
-        self.stars = []
-        for _ in range(count):
-            self.stars.append([random.randint(0, WIDTH - 1), random.randint(0, HEIGHT - 1), random.randint(40, 220)])
+    def __init__(self, count=170, rng=random):
+        # Свой генератор, засеянный от rng сессии: звёзды не сбивают игровую последовательность
+        self.rng = np.random.default_rng(rng.getrandbits(32))
+        self.x = self.rng.integers(0, WIDTH, count)
+        self.y = self.rng.integers(0, HEIGHT, count).astype(np.float64)
+        self.b = self.rng.integers(40, 221, count)
+        self._lut_key = None
+        self._lut = None
 
     def update(self, dt, speed=260):
-        for s in self.stars:
-            s[1] += int((speed + s[2]) * dt * 0.35)
-            if s[1] > HEIGHT:
-                s[1] = -random.randint(0, 80)
-                s[0] = random.randint(0, WIDTH - 1)
-                s[2] = random.randint(40, 220)
+        # Яркие звёзды летят быстрее - это и даёт параллакс по глубине
+        self.y += (speed + self.b) * (dt * 0.35)
+        over = self.y > HEIGHT
+        k = int(np.count_nonzero(over))
+        if k:
+            self.y[over] = -self.rng.integers(0, 81, k)
+            self.x[over] = self.rng.integers(0, WIDTH, k)
+            self.b[over] = self.rng.integers(40, 221, k)
+
+    def _colors(self, surface):
+        key = (surface.get_bitsize(), surface.get_masks())
+        if key != self._lut_key:
+            self._lut = np.array([surface.map_rgb((v, v, v)) for v in range(256)], dtype=np.uint32)
+            self._lut_key = key
+        return self._lut
 
     def draw(self, surface):
-        for x, y, b in self.stars:
-            surface.set_at((x, y), (b, b, b))
+        w, h = surface.get_size()
+        ys = self.y.astype(np.int32)
+        vis = (ys >= 0) & (ys < h) & (self.x < w)
+        try:
+            px = pg.surfarray.pixels2d(surface)
+        except ValueError:
+            # pixels2d не умеет 24-битные поверхности
+            for x, y, b in zip(self.x[vis].tolist(), ys[vis].tolist(), self.b[vis].tolist()):
+                surface.set_at((x, y), (b, b, b))
+            return
+        px[self.x[vis], ys[vis]] = self._colors(surface)[self.b[vis]].astype(px.dtype)
+        del px
 
 
 class Game:
     def __init__(self):
+        self._t_start = time.perf_counter()
+        self.first_frame_ms = None
         pg.init()
         try:
             pg.mixer.init()
@@ -52,22 +102,42 @@ class Game:
         self.screen = pg.display.set_mode((WIDTH, HEIGHT))
         pg.display.set_caption(TITLE)
         self.clock = pg.time.Clock()
-
-        self.font = pg.font.SysFont("consolas", 22)
-        self.big = pg.font.SysFont("consolas", 52)
-
-        self.assets = Assets()
+        self.stepper = FixedTimestep(SIM_HZ, MAX_CATCHUP_STEPS)
+        self._pending = None
+        self.profiler = FrameProfiler() if PROFILER else None
+        if self.profiler is not None:
+            self.profiler.overlay = True
+
+        t = time.perf_counter()
+        self.fonts = Fonts()
+        self.font = self.fonts.get(22)
+        self.big = self.fonts.get(52)
+        self.font_ms = (time.perf_counter() - t) * 1000.0
+        self.text = TextCache()
+
+        self.assets = Assets(bundle=open_bundle() if ASSET_BUNDLE else None)
+        if ASSET_ATLAS:
+            self.assets.pack_atlas()
+        self.audio = Audio() if pg.mixer.get_init() else None
+        self.assets.audio = self.audio
         self.state = "menu"
         self.running = True
 
-        self.highscore = load_highscore()
+        # Рекорд читается один раз при старте; партии дописывает фоновый поток
+        self.store = open_store(STORAGE_BACKEND)
+        self.highscore = self.store.best()
+        self.writer = ScoreWriter(self.store)
+        self.telemetry = Telemetry() if TELEMETRY else None
+        self._frame_ms = []
         self.last_score = 0
         self.last_end = "lose"
 
+        # Картинки и звуки грузятся в фоне, меню показывается сразу. Щелчок кнопки - маленький файл,
+        # он грузится сразу, чтобы ENTER на заставке звучал в момент нажатия
         self.snd_press = self.assets.sound("button_press.wav", volume=0.55)
-        self.snd_splash = self.assets.sound("splash.wav", volume=0.55)
-        self.snd_lose = self.assets.sound("gamelose.wav", volume=0.75)
-        self.snd_win = self.assets.sound("gamewin.wav", volume=0.75)
+        self.snd_splash = self.snd_lose = self.snd_win = None
+        self.loader = AssetLoader(self.assets)
+        self.loader.submit()
 
         if self.assets.music("music.ogg", volume=0.20):
             try:
@@ -78,14 +148,91 @@ class Game:
     def run(self):
         while self.running:
             dt = self.clock.tick(FPS) / 1000.0
+            if self.loader is not None:
+                self._poll_loader()
             if self.state == "menu":
                 self._menu_loop()
+            elif self.state == "loading":
+                self._loading_loop()
             elif self.state == "play":
+                prof = self.profiler
+                if prof is not None:
+                    prof.begin()
                 self._play_loop(dt)
+                if prof is not None:
+                    prof.end(*self.play.profile_counts())
             elif self.state == "gameover":
                 self._gameover_loop()
+            if self.audio is not None:
+                self.audio.flush()
+        self.writer.close()
+        self.store.close()
+        if self.telemetry is not None:
+            self.telemetry.close()
         pg.quit()
 
+    def _poll_loader(self, wait=False):
+        loader = self.loader
+        if wait:
+            loader.wait()
+        else:
+            loader.poll()
+        if not loader.done:
+            return
+        loader.shutdown()
+        self.loader = None
+        self.snd_splash = self.assets.sound("splash.wav", volume=0.55)
+        self.snd_lose = self.assets.sound("gamelose.wav", volume=0.75)
+        self.snd_win = self.assets.sound("gamewin.wav", volume=0.75)
+
+    def _request_start(self):
+        if self.loader is None:
+            self._start_game()
+        else:
+            self.state = "loading"
+
+    def _loading_loop(self):
+        for e in pg.event.get():
+            if e.type == pg.QUIT:
+                self.running = False
+                return
+            if e.type == pg.KEYDOWN and e.key == pg.K_ESCAPE:
+                self.state = "menu"
+                return
+
+        if self.loader is None:
+            # Щелчок уже прозвучал при нажатии ENTER в меню
+            self._start_game()
+            return
+
+        self.screen.fill((10, 10, 20))
+        t = self.text.render(self.font, "LOADING", (210, 210, 210))
+        self.screen.blit(t, t.get_rect(center=(WIDTH // 2, HEIGHT // 2 - 30)))
+        bar = pg.Rect(0, 0, 360, 14)
+        bar.center = (WIDTH // 2, HEIGHT // 2 + 10)
+        pg.draw.rect(self.screen, (90, 90, 110), bar, 1)
+        fill = bar.inflate(-4, -4)
+        fill.width = int(fill.width * self.loader.progress)
+        pg.draw.rect(self.screen, (120, 220, 255), fill)
+        pg.display.flip()
+
+    def _on_key(self, e):
+        if e.key == pg.K_F3:
+            # Профайлер создаётся только по запросу: выключенный он ничего не стоит
+            if self.profiler is None:
+                self.profiler = FrameProfiler()
+                self.profiler.overlay = True
+            else:
+                self.profiler = None
+            if self.state == "play":
+                self.play.profiler = self.profiler
+                if self.play.renderer is not None:
+                    self.play.renderer.invalidate()
+        elif e.key == pg.K_F4 and self.profiler is not None:
+            stamp = time.strftime("%Y%m%d-%H%M%S")
+            self.profiler.dump(os.path.join("data", f"profile-{stamp}.json"))
+            self.profiler.dump(os.path.join("data", f"profile-{stamp}.csv"))
+
     def _menu_loop(self):
         for e in pg.event.get():
             if e.type == pg.QUIT:
@@ -95,44 +242,69 @@ class Game:
                 if e.key == pg.K_RETURN:
                     if self.snd_press:
                         self.snd_press.play()
-                    self._start_game()
+                    self._request_start()
                     return
                 if e.key == pg.K_ESCAPE:
                     self.running = False
                     return
 
         self.screen.fill((10, 10, 20))
-        title = self.big.render("SPACE SHOOTER", True, (235, 235, 235))
+        title = self.text.render(self.big, "SPACE SHOOTER", (235, 235, 235))
         self.screen.blit(title, title.get_rect(center=(WIDTH // 2, HEIGHT // 2 - 90)))
 
-        info = self.font.render("ENTER - Start   ESC - Quit", True, (210, 210, 210))
+        info = self.text.render(self.font, "ENTER - Start   ESC - Quit", (210, 210, 210))
         self.screen.blit(info, info.get_rect(center=(WIDTH // 2, HEIGHT // 2 - 20)))
 
-        controls = self.font.render("Move: WASD/Arrows | Shoot: HOLD SPACE | Boost: SHIFT | Pause: P", True, (180, 180, 180))
+        controls = self.text.render(self.font, "Move: WASD/Arrows | Shoot: HOLD SPACE | Boost: SHIFT | Pause: P", (180, 180, 180))
         self.screen.blit(controls, controls.get_rect(center=(WIDTH // 2, HEIGHT // 2 + 20)))
 
-        hs = self.font.render(f"High score: {self.highscore}", True, (200, 200, 200))
+        hs = self.text.render(self.font, f"High score: {self.highscore}", (200, 200, 200))
         self.screen.blit(hs, hs.get_rect(center=(WIDTH // 2, HEIGHT // 2 + 70)))
 
         pg.display.flip()
+        if self.first_frame_ms is None:
+            self.first_frame_ms = (time.perf_counter() - self._t_start) * 1000.0
 
     def _start_game(self):
         if self.snd_splash:
             self.snd_splash.play()
-        self.play = PlaySession(self.screen, self.assets, self.font, self.big, self.highscore)
+        self.play = PlaySession(self.screen, self.assets, self.font, self.big, self.highscore, text=self.text,
+                                telemetry=self.telemetry)
+        self.play.profiler = self.profiler
+        if REPLAY_RECORD:
+            Recorder().attach(self.play)
+        self.stepper.reset()
+        self._pending = None
         self.state = "play"
 
     def _play_loop(self, dt):
-        result = self.play.step(dt)
+        if FIXED_TIMESTEP:
+            result = self._play_fixed(dt)
+        else:
+            result = self.play.step(dt, read_action(self._on_key))
+        tel = self.telemetry
+        if tel is not None:
+            self._frame_ms.append(dt * 1000.0)
+            if len(self._frame_ms) >= TELEMETRY_FRAME_WINDOW or (result is not None and self._frame_ms):
+                tel.emit("frames", **frame_summary(self._frame_ms))
+                self._frame_ms.clear()
         if result is None:
             return
 
+        if self.play.recorder is not None:
+            stamp = time.strftime("%Y%m%d-%H%M%S")
+            self.play.recorder.finish(self.play, result).save(os.path.join(REPLAY_DIR, f"{stamp}.rpl"))
+
         mode, score = result
         self.last_score = score
 
+        play = self.play
+        self.writer.submit(make_run(score, play.wave.wave_number - 1, play.scheduler.now, play.seed, mode))
+        if tel is not None:
+            tel.emit("session_end", result=mode, score=score, wave=play.wave.wave_number - 1,
+                     duration=round(play.scheduler.now, 3))
         if score > self.highscore:
             self.highscore = score
-            save_highscore(self.highscore)
 
         if mode == "menu":
             self.state = "menu"
@@ -148,6 +320,32 @@ class Game:
                     self.snd_lose.play()
             self.state = "gameover"
 
+    def _play_fixed(self, frame_dt):
+        action = read_action(self._on_key)
+        pending = self._pending
+        if pending is not None:
+            action.pause = action.pause != pending.pause
+            action.menu = action.menu or pending.menu
+            action.quit = action.quit or pending.quit
+            self._pending = None
+
+        steps = self.stepper.advance(frame_dt)
+        if steps == 0:
+            # Шаг симуляции в этом кадре не наступил - не теряем нажатия ESC/P
+            self._pending = action
+
+        for i in range(steps):
+            if i == steps - 1:
+                self.play.snapshot(self.stepper.dt)
+            result = self.play.step(self.stepper.dt, action, render=False)
+            if result is not None:
+                return result
+            if i == 0:
+                action = action.held()
+
+        self.play.draw(self.stepper.alpha)
+        return None
+
     def _gameover_loop(self):
         for e in pg.event.get():
             if e.type == pg.QUIT:
@@ -166,119 +364,105 @@ class Game:
 
         self.screen.fill((15, 8, 12))
         headline = "YOU WIN" if self.last_end == "win" else "GAME OVER"
-        t = self.big.render(headline, True, (255, 230, 200) if self.last_end == "win" else (255, 200, 200))
+        t = self.text.render(self.big, headline, (255, 230, 200) if self.last_end == "win" else (255, 200, 200))
         self.screen.blit(t, t.get_rect(center=(WIDTH // 2, HEIGHT // 2 - 70)))
 
-        s = self.font.render(f"Score: {self.last_score}", True, (230, 230, 230))
+        s = self.text.render(self.font, f"Score: {self.last_score}", (230, 230, 230))
         self.screen.blit(s, s.get_rect(center=(WIDTH // 2, HEIGHT // 2 - 10)))
 
-        h = self.font.render(f"High score: {self.highscore}", True, (230, 230, 230))
+        h = self.text.render(self.font, f"High score: {self.highscore}", (230, 230, 230))
         self.screen.blit(h, h.get_rect(center=(WIDTH // 2, HEIGHT // 2 + 25)))
 
-        i = self.font.render("Restart: R / Enter    ESC - Menu", True, (200, 200, 200))
+        i = self.text.render(self.font, "Restart: R / Enter    ESC - Menu", (200, 200, 200))
         self.screen.blit(i, i.get_rect(center=(WIDTH // 2, HEIGHT // 2 + 70)))
 
         pg.display.flip()
 
 
 class WaveManager:
-    def __init__(self, assets):
+    def __init__(self, assets, rng=random, telemetry=None, campaign=None):
         self.assets = assets
+        self.rng = rng
+        self.telemetry = telemetry
+        self.campaign = campaign if campaign is not None else load_campaign()
         self.wave_number = 1
+        # Текущая (последняя появившаяся) волна: скорость строя, прокрутка, метеоры
+        self.current = self.campaign.wave(1)
         self.controller = None
 
-    def _diamond(self, cx, cy, dx, dy):
-        pts = []
-        rows = [1, 2, 3, 2, 1]
-        y = cy
-        for n in rows:
-            x0 = cx - (n - 1) * dx / 2
-            for i in range(n):
-                pts.append((x0 + i * dx, y))
-            y += dy
-        return pts
-
-    def _line(self, cx, cy, n, dx):
-        x0 = cx - (n - 1) * dx / 2
-        return [(x0 + i * dx, cy) for i in range(n)]
-
-    def _two_lines(self, cx, cy, n, dx, dy):
-        top = self._line(cx, cy, n, dx)
-        bot = self._line(cx, cy + dy, n, dx)
-        return top + bot
-
-    def _v_shape(self, cx, cy, n, dx, dy):
-        pts = []
-        half = n // 2
-        for i in range(n):
-            d = abs(i - half)
-            x = cx + (i - half) * dx
-            y = cy + d * dy
-            pts.append((x, y))
-        return pts
-
     def spawn_wave(self, enemies_group, all_group, bosses_group):
         self.controller = None
+        wave = self.current = self.campaign.wave(self.wave_number)
 
-        if self.wave_number == 4:
-            boss = Boss(self.assets)
+        if wave.boss is not None:
+            boss = Boss(self.assets, self.rng, hp=wave.boss.hp, final=wave.boss.final)
             bosses_group.add(boss)
             all_group.add(boss)
+            if self.telemetry is not None:
+                self.telemetry.emit("wave_start", wave=self.wave_number, boss=True)
             self.wave_number += 1
             return True
 
-        cx = WIDTH // 2
-        start_y = 70
-        dx = 92
-        dy = 70
-
-        pattern_id = (self.wave_number - 1) % 4
-        if pattern_id == 0:
-            pts = self._diamond(cx, 0, dx, dy)
-        elif pattern_id == 1:
-            pts = self._line(cx, 0, 10, dx)
-        elif pattern_id == 2:
-            pts = self._two_lines(cx, 0, 8, dx, dy)
-        else:
-            pts = self._v_shape(cx, 0, 11, dx, dy)
-
-        min_x = min(p[0] for p in pts)
-        max_x = max(p[0] for p in pts)
-        self.controller = FormationController(left_span=min_x, right_span=max_x, start_y=start_y)
-
-        p_enemy2 = min(0.20 + (self.wave_number - 1) * 0.12, 0.75)
-        shoot_rate = 1.0 + (self.wave_number * 0.06)
+        self.controller = FormationController(left_span=wave.left, right_span=wave.right, start_y=wave.start_y,
+                                              capacity=len(wave))
+        self.controller.load(wave.xs, wave.ys)
 
-        for p in pts:
-            kind = "enemy2" if random.random() < p_enemy2 else "enemy1"
-            e = FormationEnemy(self.assets, self.controller, p, kind=kind, shoot_rate=shoot_rate)
+        # Тип при шансе enemy2 бросается на каждый корабль в прежнем порядке - с тем же seed
+        # партия и записанные повторы идут так же
+        fixed = wave.kinds
+        for i in range(len(wave)):
+            if fixed is not None:
+                kind = fixed[i]
+            else:
+                kind = "enemy2" if self.rng.random() < wave.enemy2 else "enemy1"
+            e = FormationEnemy(self.assets, self.controller, None, kind=kind, shoot_rate=wave.shoot_rate, rng=self.rng)
             enemies_group.add(e)
             all_group.add(e)
 
+        if self.telemetry is not None:
+            n2 = sum(1 for e in self.controller.members if e.kind == "enemy2")
+            self.telemetry.emit("wave_start", wave=self.wave_number, boss=False, pattern=wave.pattern,
+                                enemy1=len(wave) - n2, enemy2=n2)
         self.wave_number += 1
         return False
 
 
 class PlaySession:
-    def __init__(self, screen, assets, font, big_font, highscore):
+    def __init__(self, screen, assets, font, big_font, highscore, present=True, bullet_engine=BULLET_ENGINE,
+                 text=None, seed=None, telemetry=None, campaign=None):
+        # Вся случайность сессии идёт из self.rng: по seed и записанному вводу партия воспроизводится
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self.rng = random.Random(self.seed)
+        self.bullet_engine = bullet_engine
+        self.recorder = None
+        self.telemetry = telemetry
+        if telemetry is not None:
+            telemetry.session = self.seed
+            telemetry.emit("session_start", seed=self.seed, bullets=bullet_engine)
         self.screen = screen
+        self.present = present
         self.assets = assets
         self.font = font
         self.big_font = big_font
         self.highscore = highscore
+        self.text = text if text is not None else TextCache()
 
-        self.starfield = Starfield()
+        self.starfield = Starfield(STAR_COUNT, self.rng)
 
-        self.all_sprites = pg.sprite.Group()
+        self.all_sprites = pg.sprite.RenderUpdates()
         self.enemies = pg.sprite.Group()
         self.bosses = pg.sprite.Group()
         self.meteors = pg.sprite.Group()
         self.pickups = pg.sprite.Group()
 
-        self.bullets_player = pg.sprite.Group()
-        self.bullets_enemy = pg.sprite.Group()
         self.fx = pg.sprite.Group()
 
+        self.grid = SpatialHash()
+        self.pools = SpritePools(bullet=Bullet, explosion=Explosion, meteor=Meteor, pickup=Pickup)
+        self.bullets = make_bullet_engine(bullet_engine, self.pools, self.grid, self.all_sprites)
+        # Точные столкновения по маскам и заметание пуль после прямоугольного broadphase
+        self.precise = NARROWPHASE
+
         self.player = Player(assets)
         self.all_sprites.add(self.player)
 
@@ -295,34 +479,33 @@ class PlaySession:
         self.hp_icon = assets.image("hp.png", size=(28, 28), fallback_draw=None)
         self.up_icon = assets.image("upgrade_module.png", size=(26, 26), fallback_draw=None)
 
-        self.wave = WaveManager(assets)
-        boss_spawned = self.wave.spawn_wave(self.enemies, self.all_sprites, self.bosses)
-        if boss_spawned and self.snd_bosscoming:
-            self.snd_bosscoming.play()
-
-        self.meteor_timer = 0.0
+        # Выстрелы врагов и босса, метеоры и исчезновение бонусов - события по времени
+        self.scheduler = Scheduler()
+        self.wave = WaveManager(assets, self.rng, telemetry, campaign)
+        self.spawn_wave()
+        if ENABLE_METEORS:
+            self.scheduler.after(self._meteor_interval(), self._spawn_meteor)
 
         bg_path = os.path.join("assets", "images", "background.png")
         self.bg = assets.image("background.png", size=(WIDTH, HEIGHT), fallback_draw=None) if os.path.exists(bg_path) else None
         self.bg_scroll = 0.0
 
+        self._prev = None
+        self._prev_dt = 0.0
+        self.profiler = None
+        self.renderer = DirtyRenderer(screen, self._build_background) if DIRTY_RECTS and screen is not None else None
+
     def _proc_explosion_frames(self):
         frames = []
-        base = None
         try:
-            base = self.assets.image("spark.png", size=(40, 40), fallback_draw=None)
-        except Exception:
-            base = None
-
-        if base is not None:
+            # Кадры берутся из общего кэша Assets.variant - при рестарте ничего не пересчитывается
             for i in range(9):
                 size = 26 + i * 10
-                img = pg.transform.smoothscale(base, (size, size))
-                img = pg.transform.rotate(img, i * 22)
-                img = img.convert_alpha()
-                img.set_alpha(max(0, 255 - i * 28))
-                frames.append(img)
+                frames.append(self.assets.variant("spark.png", size=(40, 40), scale=(size, size),
+                                                  angle=i * 22, opacity=max(0, 255 - i * 28)))
             return frames
+        except Exception:
+            frames = []
 
         for r in range(6, 54, 6):
             s = pg.Surface((72, 72), pg.SRCALPHA)
@@ -332,115 +515,141 @@ class PlaySession:
             frames.append(s)
         return frames
 
-    def step(self, dt):
-        for e in pg.event.get():
-            if e.type == pg.QUIT:
-                return ("quit", self.score)
-            if e.type == pg.KEYDOWN:
-                if e.key == pg.K_ESCAPE:
-                    return ("menu", self.score)
-                if e.key == pg.K_p:
-                    self.paused = not self.paused
+    def step(self, dt, action=None, render=True):
+        if action is None:
+            action = read_action()
+        if self.recorder is not None:
+            self.recorder.record(self, dt, action)
+        if action.quit:
+            return ("quit", self.score)
+        if action.menu:
+            return ("menu", self.score)
+        if action.pause:
+            self.paused = not self.paused
 
         if self.paused:
-            self._draw(paused=True)
+            if render:
+                self._draw(paused=True)
             return None
 
-        keys = pg.key.get_pressed()
-        self.player.update(dt, keys)
+        prof = self.profiler
+        if prof is not None:
+            prof.lap("input")
 
-        if keys[pg.K_SPACE]:
+        self.player.update(dt, action)
+
+        if action.fire:
             if self.player.can_shoot():
-                bullets = self.player.shoot()
-                for b in bullets:
-                    self.bullets_player.add(b)
-                    self.all_sprites.add(b)
+                self.player.shoot(self.bullets.spawn)
+
+        if prof is not None:
+            prof.lap("player")
 
-        if self.wave.controller is not None and len(self.enemies) > 0:
-            speed = FORMATION_SPEED + (self.wave.wave_number * 5)
-            self.wave.controller.update(dt, speed=speed, drop=FORMATION_DROP, margin=FORMATION_MARGIN)
+        formation = self.wave.controller
+        if formation is not None and len(self.enemies) > 0:
+            formation.update(dt, speed=self.wave.current.speed * FORMATION_SPEED_SCALE, drop=FORMATION_DROP, margin=FORMATION_MARGIN)
+            formation.step(dt)
 
-        self.starfield.update(dt, speed=275 + self.wave.wave_number * 6)
+        if STARFIELD_SCROLL:
+            self.starfield.update(dt, speed=self.wave.current.scroll)
 
-        self.enemies.update(dt)
         self.bosses.update(dt)
+        tel = self.telemetry
+        if tel is not None:
+            for boss in self.bosses:
+                phase = boss.phase()
+                if phase != boss.reported_phase:
+                    boss.reported_phase = phase
+                    tel.emit("boss_phase", phase=phase, hp=boss.hp)
         self.meteors.update(dt)
         self.pickups.update(dt)
-        self.bullets_player.update(dt)
-        self.bullets_enemy.update(dt)
+        self.bullets.update(dt)
         self.fx.update(dt)
 
-        for en in list(self.enemies):
-            bullet = en.try_shoot(self.player.rect.center)
-            if bullet:
-                self.bullets_enemy.add(bullet)
-                self.all_sprites.add(bullet)
+        if prof is not None:
+            prof.lap("update")
 
-        for boss in list(self.bosses):
-            bullets = boss.try_shoot()
-            if bullets:
-                for b in bullets:
-                    self.bullets_enemy.add(b)
-                    self.all_sprites.add(b)
+        self.scheduler.advance(dt)
+
+        if prof is not None:
+            prof.lap("fire")
 
         if len(self.enemies) == 0 and len(self.bosses) == 0:
-            boss_spawned = self.wave.spawn_wave(self.enemies, self.all_sprites, self.bosses)
-            if boss_spawned and self.snd_bosscoming:
-                self.snd_bosscoming.play()
+            if tel is not None:
+                tel.emit("wave_clear", wave=self.wave.wave_number - 1, t=round(self.scheduler.now, 3), score=self.score)
+            self.spawn_wave()
 
         if self.wave.controller is not None:
-            for en in self.enemies:
-                if en.rect.bottom >= HEIGHT - 130:
-                    return ("lose", self.score)
-
-        if ENABLE_METEORS and len(self.bosses) == 0:
-            base_ms = max(SPAWN_METEOR_MIN_MS, SPAWN_METEOR_BASE_MS - (self.wave.wave_number * 30))
-            interval = base_ms / 1000.0
-            self.meteor_timer += dt
-            if self.meteor_timer >= interval:
-                self.meteor_timer = 0.0
-                m = Meteor(self.assets, level=self.wave.wave_number)
-                self.meteors.add(m)
-                self.all_sprites.add(m)
-
-        hits = pg.sprite.groupcollide(self.enemies, self.bullets_player, False, True)
+            lowest = self.wave.controller.lowest_bottom()
+            if lowest is not None and lowest >= HEIGHT - 130:
+                return ("lose", self.score)
+
+        if prof is not None:
+            prof.lap("spawn")
+
+        grid = self.grid
+        grid.reset()
+        precise = self.precise
+        body = collide_mask if precise else None
+
+        hits = self.bullets.collide_group(self.enemies, "player", precise)
         for enemy, bullets in hits.items():
             if enemy.damage(len(bullets)):
                 self._explode(enemy.rect.center)
                 self._maybe_drop(enemy.rect.center)
                 self.score += 25 if enemy.kind == "enemy2" else 12
                 enemy.kill()
+                if tel is not None:
+                    tel.emit("kill", kind=enemy.kind, wave=self.wave.wave_number - 1)
 
-        boss_hits = pg.sprite.groupcollide(self.bosses, self.bullets_player, False, True)
+        boss_hits = self.bullets.collide_group(self.bosses, "player", precise)
         for boss, bullets in boss_hits.items():
             if boss.damage(len(bullets)):
                 self._explode(boss.rect.center)
                 self.score += 500
                 boss.kill()
-                return ("win", self.score)
+                if tel is not None:
+                    tel.emit("kill", kind="boss", wave=self.wave.wave_number - 1)
+                if boss.final:
+                    return ("win", self.score)
 
-        hits_m = pg.sprite.groupcollide(self.meteors, self.bullets_player, False, True)
+        hits_m = self.bullets.collide_group(self.meteors, "player", precise)
         for meteor, bullets in hits_m.items():
             if meteor.damage(len(bullets)):
                 self._explode(meteor.rect.center)
                 self._maybe_drop(meteor.rect.center)
                 self.score += 8
                 meteor.kill()
+                if tel is not None:
+                    tel.emit("kill", kind="meteor", wave=self.wave.wave_number - 1)
 
-        if pg.sprite.spritecollide(self.player, self.bullets_enemy, True):
+        if self.bullets.collide_sprite(self.player, "enemy", precise):
             self.player.damage(1)
+            if tel is not None:
+                tel.emit("damage", source="bullet", hp=self.player.hp)
             if self.player.hp <= 0:
                 return ("lose", self.score)
 
-        if (pg.sprite.spritecollide(self.player, self.enemies, True) or
-                pg.sprite.spritecollide(self.player, self.bosses, False) or
-                pg.sprite.spritecollide(self.player, self.meteors, True)):
+        # Проверки по очереди, как раньше: до метеоров дело доходит, только если не было тарана
+        if grid.spritecollide(self.player, self.enemies, True, body):
+            rammed = "enemy"
+        elif grid.spritecollide(self.player, self.bosses, False, body):
+            rammed = "boss"
+        elif grid.spritecollide(self.player, self.meteors, True, body):
+            rammed = "meteor"
+        else:
+            rammed = None
+        if rammed is not None:
             self.player.damage(1)
+            if tel is not None:
+                tel.emit("damage", source=rammed, hp=self.player.hp)
             if self.player.hp <= 0:
                 return ("lose", self.score)
 
-        collected = pg.sprite.spritecollide(self.player, self.pickups, True)
+        collected = grid.spritecollide(self.player, self.pickups, True)
         for p in collected:
+            if tel is not None:
+                tel.emit("pickup", kind=p.kind)
             if p.kind == "hp":
                 self.player.heal(1)
                 if self.snd_pick_hp:
@@ -450,25 +659,113 @@ class PlaySession:
                 if self.snd_pick_module:
                     self.snd_pick_module.play()
 
-        self._draw(paused=False)
+        if prof is not None:
+            prof.lap("collide")
+
+        if render:
+            self._draw(paused=False)
         return None
 
+    def spawn_wave(self):
+        boss_spawned = self.wave.spawn_wave(self.enemies, self.all_sprites, self.bosses)
+        # Новая волна появляется, только когда прежние враги и босс уничтожены - все в группах новые
+        for sprite in self.enemies:
+            self.schedule_fire(sprite)
+        for sprite in self.bosses:
+            self.schedule_fire(sprite)
+        if boss_spawned and self.snd_bosscoming:
+            self.snd_bosscoming.play()
+        return boss_spawned
+
+    def schedule_fire(self, sprite):
+        return self.scheduler.after(sprite.fire_timer, self._fire, sprite)
+
+    def _fire(self, sprite):
+        # Убитый враг просто не перезаводит событие
+        if not sprite.alive():
+            return
+        sprite.shoot(self.player.rect.center, self.bullets.spawn)
+        self.scheduler.after(sprite.next_fire_delay(), self._fire, sprite)
+
+    def _meteor_interval(self):
+        # Множитель применяется при каждом вызове: пакетный прогон меняет его между партиями
+        return max(SPAWN_METEOR_MIN_MS, self.wave.current.meteor_ms * METEOR_INTERVAL_SCALE) / 1000.0
+
+    def _spawn_meteor(self):
+        # В волнах с выключенными метеорами (бой с боссом) они не падают, но событие продолжает тикать
+        wave = self.wave.current
+        if wave.meteors:
+            self.pools["meteor"].acquire((self.meteors, self.all_sprites), self.assets, wave.meteor_level, self.rng)
+        self.scheduler.after(self._meteor_interval(), self._spawn_meteor)
+
+    def _despawn(self, sprite, generation):
+        # Бонус мог быть подобран и уже переиспользован пулом - тогда поколение другое
+        if sprite.generation == generation and not sprite.in_pool:
+            sprite.kill()
+
     def _maybe_drop(self, pos):
-        if random.random() > DROP_CHANCE:
+        if self.rng.random() > DROP_CHANCE:
             return
-        kind = "hp" if random.random() < DROP_HP_WEIGHT else "upgrade"
-        p = Pickup(self.assets, kind, pos)
-        self.pickups.add(p)
-        self.all_sprites.add(p)
+        kind = "hp" if self.rng.random() < DROP_HP_WEIGHT else "upgrade"
+        p = self.pools["pickup"].acquire((self.pickups, self.all_sprites), self.assets, kind, pos)
+        self.scheduler.after(p.despawn_time(), self._despawn, p, p.generation)
 
     def _explode(self, pos):
         if self.snd_expl:
             self.snd_expl.play()
-        ex = Explosion(self.explosion_frames, pos, duration=0.30)
-        self.fx.add(ex)
-        self.all_sprites.add(ex)
+        self.pools["explosion"].acquire((self.fx, self.all_sprites), self.explosion_frames, pos, 0.30)
+
+    def checksum(self):
+        # Сумма всего, что влияет на ход партии: по ней повтор сверяется с записью
+        p = self.player
+        ints = [self.score, p.hp, p.weapon_level, self.wave.wave_number, int(self.paused), len(self.scheduler)]
+        ints.extend(v for s in self.all_sprites for v in s.rect)
+        h = zlib.crc32(np.array(ints, dtype=np.int64).tobytes())
+        h = zlib.crc32(np.array((p.x, p.y, p.energy, p.fire_timer, self.scheduler.now)).tobytes(), h)
+        h = zlib.crc32(np.array(self.rng.getstate()[1], dtype=np.uint32).tobytes(), h)
+        return self.bullets.digest(h)
+
+    def snapshot(self, dt):
+        # Положения перед последним шагом симуляции кадра - от них интерполируется отрисовка
+        self._prev = {s: (s.rect.center, getattr(s, "generation", 0)) for s in self.all_sprites}
+        self._prev_dt = dt
+
+    def draw(self, alpha=1.0):
+        if self.paused or alpha >= 1.0 or not self._prev:
+            self._draw(paused=self.paused)
+            return
+
+        moved = []
+        for s, (prev, gen) in self._prev.items():
+            if getattr(s, "generation", 0) != gen or not s.alive():
+                continue
+            cur = s.rect.center
+            if cur == prev:
+                continue
+            s.rect.center = (round(prev[0] + (cur[0] - prev[0]) * alpha),
+                             round(prev[1] + (cur[1] - prev[1]) * alpha))
+            moved.append((s, cur))
+
+        self._draw(paused=False, lag=(1.0 - alpha) * self._prev_dt)
+
+        for s, cur in moved:
+            s.rect.center = cur
+
+    def _draw(self, paused=False, lag=0.0):
+        if self.renderer is not None and not paused and not self._background_scrolls():
+            dirty = self.renderer.frame(self.all_sprites, self.bullets, self._draw_hud, self._hud_state(), lag)
+            box = self._draw_overlay()
+            if box is not None and dirty is not None:
+                dirty.append(box)
+            if self.present:
+                if dirty is None:
+                    pg.display.flip()
+                else:
+                    pg.display.update(dirty)
+            if self.profiler is not None:
+                self.profiler.lap("present")
+            return
 
-    def _draw(self, paused=False):
         self.screen.fill((10, 10, 20))
         if self.bg is not None:
             self.bg_scroll = (self.bg_scroll + 200) % HEIGHT
@@ -479,31 +776,73 @@ class PlaySession:
             self.starfield.draw(self.screen)
 
         self.all_sprites.draw(self.screen)
+        self.bullets.draw(self.screen, lag=lag)
+        self._draw_hud()
 
+        if paused:
+            t = self.text.render(self.big_font, "PAUSED", (240, 240, 240))
+            self.screen.blit(t, t.get_rect(center=(WIDTH // 2, HEIGHT // 2)))
+
+        self._draw_overlay()
+        if self.renderer is not None:
+            self.renderer.invalidate()
+        if self.present:
+            pg.display.flip()
+        if self.profiler is not None:
+            self.profiler.lap("present")
+
+    def _draw_overlay(self):
+        prof = self.profiler
+        if prof is None:
+            return None
+        prof.lap("draw")
+        if prof.overlay:
+            return prof.draw_overlay(self.screen, self.font)
+        return None
+
+    def profile_counts(self):
+        counts = (
+            len(self.all_sprites), len(self.enemies), len(self.bosses), len(self.meteors),
+            len(self.pickups), len(self.fx), self.bullets.count("player"), self.bullets.count("enemy"),
+        )
+        allocations = sum(p["allocations"] for p in self.pools.stats().values())
+        return counts, allocations
+
+    def _background_scrolls(self):
+        return self.bg is not None or STARFIELD_SCROLL
+
+    def _build_background(self):
+        bg = pg.Surface((WIDTH, HEIGHT))
+        if pg.display.get_surface() is not None:
+            bg = bg.convert()
+        bg.fill((10, 10, 20))
+        self.starfield.draw(bg)
+        return bg
+
+    def _hud_state(self):
+        boss = next(iter(self.bosses), None)
+        energy_px = int(240 * max(0.0, min(1.0, self.player.energy / ENERGY_MAX)))
+        return (self.player.hp, self.score, self.wave.wave_number, self.player.weapon_level,
+                boss.hp if boss is not None else None, energy_px)
+
+    def _draw_hud(self):
+        text = self.text
+        rects = []
         x0 = UI_MARGIN
         y0 = UI_MARGIN
         for i in range(self.player.hp):
-            self.screen.blit(self.hp_icon, (x0 + i * 30, y0))
-
-        score_text = self.font.render(f"Score: {self.score}", True, (235, 235, 235))
-        self.screen.blit(score_text, (UI_MARGIN, UI_MARGIN + 36))
+            rects.append(self.screen.blit(self.hp_icon, (x0 + i * 30, y0)))
 
-        wave_text = self.font.render(f"Wave: {self.wave.wave_number - 1}", True, (235, 235, 235))
-        self.screen.blit(wave_text, (UI_MARGIN, UI_MARGIN + 64))
+        rects.append(text.draw_counter(self.screen, self.font, "Score: ", self.score, (235, 235, 235), (UI_MARGIN, UI_MARGIN + 36)))
+        rects.append(text.draw_counter(self.screen, self.font, "Wave: ", self.wave.wave_number - 1, (235, 235, 235), (UI_MARGIN, UI_MARGIN + 64)))
 
         draw_bar(self.screen, UI_MARGIN, HEIGHT - 26 - UI_MARGIN, 240, 20, self.player.energy / ENERGY_MAX)
+        rects.append(pg.Rect(UI_MARGIN, HEIGHT - 26 - UI_MARGIN, 240, 20))
 
-        self.screen.blit(self.up_icon, (UI_MARGIN + 260, HEIGHT - 30 - UI_MARGIN))
-        wtxt = self.font.render(f"x{self.player.weapon_level}", True, (220, 220, 220))
-        self.screen.blit(wtxt, (UI_MARGIN + 292, HEIGHT - 29 - UI_MARGIN))
+        rects.append(self.screen.blit(self.up_icon, (UI_MARGIN + 260, HEIGHT - 30 - UI_MARGIN)))
+        rects.append(text.draw_counter(self.screen, self.font, "x", self.player.weapon_level, (220, 220, 220), (UI_MARGIN + 292, HEIGHT - 29 - UI_MARGIN)))
 
         if len(self.bosses) > 0:
             boss = next(iter(self.bosses))
-            bhp = self.font.render(f"BOSS HP: {boss.hp}", True, (255, 210, 210))
-            self.screen.blit(bhp, (WIDTH - 240, UI_MARGIN))
-
-        if paused:
-            t = self.big_font.render("PAUSED", True, (240, 240, 240))
-            self.screen.blit(t, t.get_rect(center=(WIDTH // 2, HEIGHT // 2)))
-
-        pg.display.flip()
+            rects.append(text.draw_counter(self.screen, self.font, "BOSS HP: ", boss.hp, (255, 210, 210), (WIDTH - 240, UI_MARGIN)))
+        return rects
@@ -0,0 +1,42 @@
+import heapq
+import itertools
+
+
+class Scheduler:
+    def __init__(self):
+        self.now = 0.0
+        self._heap = []
+        self._seq = itertools.count()
+        self.fired = 0
+
+    def __len__(self):
+        return len(self._heap)
+
+    def at(self, when, callback, *args):
+        # Запись - список, чтобы cancel() мог пометить её на месте; seq сохраняет порядок
+        # постановки для событий с одинаковым сроком
+        event = [when, next(self._seq), callback, args]
+        heapq.heappush(self._heap, event)
+        return event
+
+    def after(self, delay, callback, *args):
+        return self.at(self.now + delay, callback, *args)
+
+    def cancel(self, event):
+        # Ленивое удаление: запись остаётся в куче и пропускается, когда до неё дойдёт очередь
+        event[2] = None
+
+    def advance(self, dt):
+        self.now += dt
+        heap = self._heap
+        n = 0
+        while heap and heap[0][0] <= self.now:
+            _, _, callback, args = heapq.heappop(heap)
+            if callback is not None:
+                callback(*args)
+                n += 1
+        self.fired += n
+        return n
+
+    def clear(self):
+        self._heap.clear()
@@ -1,5 +1,8 @@
 import random
+import numpy as np
 import pygame as pg
+from .pool import Poolable
+from .assets import mask_for
 from .config import (
     WIDTH, HEIGHT,
     PLAYER_SPEED, PLAYER_HP_MAX,
@@ -21,26 +24,42 @@ def clamp_rect(rect: pg.Rect):
         rect.bottom = HEIGHT
 
 
-class Bullet(pg.sprite.Sprite):
+class Bullet(Poolable):
     def __init__(self, image, x, y, vx, vy, owner="player"):
         super().__init__()
+        self.reset(image, x, y, vx, vy, owner)
+
+    def reset(self, image, x, y, vx, vy, owner="player"):
         self.image = image
+        self.mask = mask_for(image)
         self.rect = self.image.get_rect(center=(x, y))
+        self.x = float(self.rect.x)
+        self.y = float(self.rect.y)
+        # Угол rect на прошлом тике - для заметания пули (narrowphase.swept_collide)
+        self.px = self.rect.x
+        self.py = self.rect.y
         self.vx = float(vx)
         self.vy = float(vy)
         self.owner = owner
 
     def update(self, dt):
-        self.rect.x += int(self.vx * dt)
-        self.rect.y += int(self.vy * dt)
+        # Позиция копится во float: int() на каждом кадре давал дрейф, зависящий от частоты кадров
+        self.px, self.py = self.rect.topleft
+        self.x += self.vx * dt
+        self.y += self.vy * dt
+        self.rect.x = round(self.x)
+        self.rect.y = round(self.y)
         if (self.rect.right < 0 or self.rect.left > WIDTH or
                 self.rect.bottom < 0 or self.rect.top > HEIGHT):
             self.kill()
 
 
-class Explosion(pg.sprite.Sprite):
+class Explosion(Poolable):
     def __init__(self, frames, pos, duration=0.32):
         super().__init__()
+        self.reset(frames, pos, duration)
+
+    def reset(self, frames, pos, duration=0.32):
         self.frames = frames
         self.duration = duration
         self.t = 0.0
@@ -63,7 +82,10 @@ class Player(pg.sprite.Sprite):
         self.assets = assets
 
         self.image = assets.image("player.png", size=(74, 84), fallback_draw=None)
+        self.mask = mask_for(self.image)
         self.rect = self.image.get_rect(center=(WIDTH // 2, HEIGHT - 88))
+        self.x = float(self.rect.x)
+        self.y = float(self.rect.y)
 
         self.hp = PLAYER_HP_MAX
         self.hp_max = PLAYER_HP_MAX
@@ -80,31 +102,29 @@ class Player(pg.sprite.Sprite):
 
         self.bullet_img = assets.image("spark.png", size=(10, 18), fallback_draw=None)
 
-    def update(self, dt, keys):
+    def update(self, dt, action):
         self.energy = min(ENERGY_MAX, self.energy + ENERGY_REGEN_PER_SEC * dt)
 
         speed = PLAYER_SPEED
-        boosting = keys[pg.K_LSHIFT] or keys[pg.K_RSHIFT]
-        if boosting and self.energy > 0:
+        if action.boost and self.energy > 0:
             speed *= BOOST_MULT
             self.energy = max(0.0, self.energy - ENERGY_BOOST_COST_PER_SEC * dt)
 
-        vx = vy = 0
-        if keys[pg.K_w] or keys[pg.K_UP]:
-            vy -= 1
-        if keys[pg.K_s] or keys[pg.K_DOWN]:
-            vy += 1
-        if keys[pg.K_a] or keys[pg.K_LEFT]:
-            vx -= 1
-        if keys[pg.K_d] or keys[pg.K_RIGHT]:
-            vx += 1
+        vx = action.move_x
+        vy = action.move_y
 
         if vx and vy:
             speed *= 0.7071
 
-        self.rect.x += int(vx * speed * dt)
-        self.rect.y += int(vy * speed * dt)
+        self.x += vx * speed * dt
+        self.y += vy * speed * dt
+        self.rect.x = round(self.x)
+        self.rect.y = round(self.y)
         clamp_rect(self.rect)
+        if self.rect.x != round(self.x):
+            self.x = float(self.rect.x)
+        if self.rect.y != round(self.y):
+            self.y = float(self.rect.y)
 
         self.fire_timer = max(0.0, self.fire_timer - dt)
 
@@ -112,7 +132,7 @@ class Player(pg.sprite.Sprite):
         need = ENERGY_SHOT_COST * self.weapon_level
         return self.fire_timer <= 0.0 and self.energy >= need
 
-    def shoot(self):
+    def shoot(self, spawn=Bullet):
         self.fire_timer = self.fire_cd
         self.energy -= ENERGY_SHOT_COST * self.weapon_level
         if self.snd_shoot:
@@ -132,7 +152,7 @@ class Player(pg.sprite.Sprite):
 
         bullets = []
         for xoff, vx in pattern:
-            bullets.append(Bullet(self.bullet_img, cx + xoff, y, vx, -BULLET_SPEED_PLAYER, owner="player"))
+            bullets.append(spawn(self.bullet_img, cx + xoff, y, vx, -BULLET_SPEED_PLAYER, "player"))
         return bullets
 
     def damage(self, amount=1):
@@ -147,31 +167,89 @@ class Player(pg.sprite.Sprite):
         self.weapon_level = min(self.weapon_level_max, self.weapon_level + 1)
 
 
-class Pickup(pg.sprite.Sprite):
+class Pickup(Poolable):
     def __init__(self, assets, kind, pos):
         super().__init__()
+        self.reset(assets, kind, pos)
+
+    def reset(self, assets, kind, pos):
         self.kind = kind
         if kind == "hp":
             self.image = assets.image("hp.png", size=(36, 36), fallback_draw=None)
         else:
             self.image = assets.image("upgrade_module.png", size=(38, 38), fallback_draw=None)
         self.rect = self.image.get_rect(center=pos)
+        self.y = float(self.rect.y)
         self.vy = 180
 
     def update(self, dt):
-        self.rect.y += int(self.vy * dt)
-        if self.rect.top > HEIGHT + 50:
-            self.kill()
+        # Исчезновение за нижним краем ставит в очередь PlaySession (despawn_time)
+        self.y += self.vy * dt
+        self.rect.y = round(self.y)
+
+    def despawn_time(self):
+        # Через сколько секунд rect.top станет больше HEIGHT + 50
+        return max(0.0, (HEIGHT + 50.5 - self.y) / self.vy)
 
 
 class FormationController:
-    def __init__(self, left_span, right_span, start_y):
+    def __init__(self, left_span, right_span, start_y, capacity=16):
         self.offset_x = 0.0
         self.offset_y = float(start_y)
         self.dir = 1
         self.left_span = float(left_span)
         self.right_span = float(right_span)
 
+        # Состояние всех кораблей строя - в массивах по слотам; спрайты только рисуются
+        self.members = []
+        self.n = 0
+        self.base_x = np.zeros(capacity)
+        self.base_y = np.zeros(capacity)
+        self.w = np.zeros(capacity, dtype=np.int64)
+        self.h = np.zeros(capacity, dtype=np.int64)
+        self.hp = np.zeros(capacity, dtype=np.int64)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.left = np.zeros(capacity, dtype=np.int64)
+        self.top = np.zeros(capacity, dtype=np.int64)
+
+    def _grow(self):
+        cap = len(self.base_x) * 2
+        for name in ("base_x", "base_y", "w", "h", "hp", "alive", "left", "top"):
+            old = getattr(self, name)
+            new = np.zeros(cap, dtype=old.dtype)
+            new[:self.n] = old[:self.n]
+            setattr(self, name, new)
+
+    def load(self, base_x, base_y):
+        # Позиции всей волны заранее посчитаны при загрузке кампании - просто копия таблицы;
+        # корабли затем занимают слоты по порядку через attach
+        while len(self.base_x) < len(base_x):
+            self._grow()
+        self.base_x[:len(base_x)] = base_x
+        self.base_y[:len(base_y)] = base_y
+
+    def add(self, enemy, base_pos, hp):
+        if self.n == len(self.base_x):
+            self._grow()
+        self.base_x[self.n], self.base_y[self.n] = base_pos
+        return self.attach(enemy, hp)
+
+    def attach(self, enemy, hp):
+        i = self.n
+        self.w[i], self.h[i] = enemy.image.get_size()
+        self.hp[i] = hp
+        self.alive[i] = True
+        self.members.append(enemy)
+        self.n = i + 1
+        return i
+
+    def _positions(self, idx):
+        # Как image.get_rect(center=(int(x), int(y))): int() отбрасывает дробь к нулю
+        cx = np.trunc(self.base_x[idx] + self.offset_x).astype(np.int64)
+        cy = np.trunc(self.base_y[idx] + self.offset_y).astype(np.int64)
+        self.left[idx] = cx - self.w[idx] // 2
+        self.top[idx] = cy - self.h[idx] // 2
+
     def update(self, dt, speed, drop, margin):
         self.offset_x += self.dir * speed * dt
         left_world = self.offset_x + self.left_span
@@ -187,55 +265,90 @@ class FormationController:
             self.dir *= -1
             self.offset_y += drop
 
+    def step(self, dt):
+        # Один проход по всему строю: позиции и перенос в rect живых спрайтов.
+        # Стрельбу будит планировщик PlaySession, а не опрос каждого корабля
+        idx = np.flatnonzero(self.alive[:self.n])
+        if not len(idx):
+            return
+        self._positions(idx)
+        members = self.members
+        for i, x, y in zip(idx.tolist(), self.left[idx].tolist(), self.top[idx].tolist()):
+            members[i].rect.topleft = (x, y)
+
+    def lowest_bottom(self):
+        alive = self.alive[:self.n]
+        if not alive.any():
+            return None
+        return int((self.top[:self.n] + self.h[:self.n])[alive].max())
+
 
 class FormationEnemy(pg.sprite.Sprite):
-    def __init__(self, assets, controller, base_pos, kind, shoot_rate):
+    def __init__(self, assets, controller, base_pos, kind, shoot_rate, rng=random):
         super().__init__()
         self.assets = assets
+        self.rng = rng
         self.controller = controller
-        self.base_x, self.base_y = base_pos
         self.kind = kind
 
         if kind == "enemy1":
-            self.hp = ENEMY1_HP
+            hp = ENEMY1_HP
             self.image = assets.image("enemy1.png", size=(68, 44), fallback_draw=None)
             self.fire_min, self.fire_max = 1.35, 2.25
             self.bullet_speed_mul = 0.90
             self.snd_vol = 0.12
         else:
-            self.hp = ENEMY2_HP
+            hp = ENEMY2_HP
             self.image = assets.image("enemy2.png", size=(74, 50), fallback_draw=None)
             self.fire_min, self.fire_max = 0.85, 1.55
             self.bullet_speed_mul = 1.05
             self.snd_vol = 0.14
 
-        self.rect = self.image.get_rect(center=(0, 0))
+        self.mask = mask_for(self.image)
+        self.rect = self.image.get_rect()
+        # base_pos=None - позиция уже в слоте из таблицы волны (FormationController.load)
+        if base_pos is None:
+            self.slot = controller.attach(self, hp)
+        else:
+            self.slot = controller.add(self, base_pos, hp)
         self._sync_pos()
 
         self.shoot_rate = shoot_rate
-        self.fire_timer = random.uniform(self.fire_min, self.fire_max) / max(0.35, self.shoot_rate)
+        # Задержка до первого выстрела; дальше выстрелы ставит в очередь планировщик
+        self.fire_timer = self.next_fire_delay()
 
-        b = assets.image("spark.png", size=(10, 16), fallback_draw=None)
-        self.bullet_img = pg.transform.rotate(b, 180)
+        self.bullet_img = assets.variant("spark.png", size=(10, 16), angle=180)
         self.snd_shoot = assets.sound("shoot.wav", volume=self.snd_vol)
 
+    @property
+    def hp(self):
+        return int(self.controller.hp[self.slot])
+
+    @hp.setter
+    def hp(self, value):
+        self.controller.hp[self.slot] = value
+
     def _sync_pos(self):
-        cx = int(self.base_x + self.controller.offset_x)
-        cy = int(self.base_y + self.controller.offset_y)
-        self.rect = self.image.get_rect(center=(cx, cy))
+        c = self.controller
+        c._positions(self.slot)
+        self.rect.topleft = (int(c.left[self.slot]), int(c.top[self.slot]))
 
     def update(self, dt):
-        self.fire_timer -= dt
+        # Обычно строй двигает FormationController.step; это - для одиночного спрайта
         self._sync_pos()
 
+    def kill(self):
+        self.controller.alive[self.slot] = False
+        super().kill()
+
     def damage(self, amount=1):
-        self.hp -= amount
-        return self.hp <= 0
+        self.controller.hp[self.slot] -= amount
+        return bool(self.controller.hp[self.slot] <= 0)
 
-    def try_shoot(self, player_pos):
-        if self.fire_timer > 0:
-            return None
+    def next_fire_delay(self):
+        return self.rng.uniform(self.fire_min, self.fire_max) / max(0.35, self.shoot_rate)
 
+    def shoot(self, player_pos, spawn=Bullet):
         px, _ = player_pos
         dx = px - self.rect.centerx
         dist = max(1.0, abs(dx))
@@ -243,62 +356,76 @@ class FormationEnemy(pg.sprite.Sprite):
         vx = (dx / dist) * (BULLET_SPEED_ENEMY * 0.32)
         vy = BULLET_SPEED_ENEMY * self.bullet_speed_mul
 
-        self.fire_timer = random.uniform(self.fire_min, self.fire_max) / max(0.35, self.shoot_rate)
-
         if self.snd_shoot:
             self.snd_shoot.play()
 
-        return Bullet(self.bullet_img, self.rect.centerx, self.rect.bottom - 2, vx, vy, owner="enemy")
+        return spawn(self.bullet_img, self.rect.centerx, self.rect.bottom - 2, vx, vy, "enemy")
 
 
 class Boss(pg.sprite.Sprite):
-    def __init__(self, assets):
+    def __init__(self, assets, rng=random, hp=None, final=True):
         super().__init__()
         self.assets = assets
+        self.rng = rng
         self.kind = "boss"
-        self.hp = BOSS_HP
+        self.max_hp = BOSS_HP if hp is None else hp
+        self.hp = self.max_hp
+        self.final = final
 
         self.image = assets.image("boss.png", size=(280, 200), fallback_draw=None)
+        self.mask = mask_for(self.image)
         self.rect = self.image.get_rect(midtop=(WIDTH // 2, -220))
+        self.x = float(self.rect.x)
+        self.y = float(self.rect.y)
 
         self.state = "enter"
         self.vx = 240
+        # Последняя фаза, о которой сообщили в телеметрию
+        self.reported_phase = None
         self.fire_timer = 1.2
 
-        b = assets.image("spark.png", size=(12, 20), fallback_draw=None)
-        self.bullet_img = pg.transform.rotate(b, 180)
+        self.bullet_img = assets.variant("spark.png", size=(12, 20), angle=180)
         self.snd_shoot = assets.sound("shoot.wav", volume=0.18)
 
     def update(self, dt):
         if self.state == "enter":
-            self.rect.y += int(220 * dt)
-            if self.rect.y >= BOSS_ENTRY_Y:
-                self.rect.y = BOSS_ENTRY_Y
+            self.y += 220 * dt
+            if self.y >= BOSS_ENTRY_Y:
+                self.y = float(BOSS_ENTRY_Y)
                 self.state = "fight"
+            self.rect.y = round(self.y)
         else:
-            self.rect.x += int(self.vx * dt)
+            self.x += self.vx * dt
+            self.rect.x = round(self.x)
             if self.rect.left < 60:
                 self.rect.left = 60
+                self.x = float(self.rect.x)
                 self.vx *= -1
             if self.rect.right > WIDTH - 60:
                 self.rect.right = WIDTH - 60
+                self.x = float(self.rect.x)
                 self.vx *= -1
 
-        self.fire_timer -= dt
-
     def damage(self, amount=1):
         self.hp -= amount
         return self.hp <= 0
 
-    def try_shoot(self):
-        if self.fire_timer > 0:
-            return None
+    def phase(self):
+        if self.state == "enter":
+            return "enter"
+        if self.hp * 4 <= self.max_hp:
+            return "last"
+        if self.hp * 2 <= self.max_hp:
+            return "half"
+        return "fight"
 
-        self.fire_timer = random.uniform(0.55, 0.95)
+    def next_fire_delay(self):
+        return self.rng.uniform(0.55, 0.95)
 
+    def shoot(self, target_pos=None, spawn=Bullet):
         bullets = []
         for vx in (-240, -120, 0, 120, 240):
-            bullets.append(Bullet(self.bullet_img, self.rect.centerx, self.rect.bottom - 6, vx, BULLET_SPEED_ENEMY * 1.20, owner="enemy"))
+            bullets.append(spawn(self.bullet_img, self.rect.centerx, self.rect.bottom - 6, vx, BULLET_SPEED_ENEMY * 1.20, "enemy"))
 
         if self.snd_shoot:
             self.snd_shoot.play()
@@ -306,24 +433,32 @@ class Boss(pg.sprite.Sprite):
         return bullets
 
 
-class Meteor(pg.sprite.Sprite):
-    def __init__(self, assets, level=1):
+class Meteor(Poolable):
+    def __init__(self, assets, level=1, rng=random):
         super().__init__()
-        size = random.choice([(52, 52), (66, 66), (82, 82)])
+        self.reset(assets, level, rng)
+
+    def reset(self, assets, level=1, rng=random):
+        size = rng.choice([(52, 52), (66, 66), (82, 82)])
         self.image = assets.image("meteor.png", size=size, fallback_draw=None)
+        self.mask = mask_for(self.image)
 
-        x = random.randint(40, WIDTH - 40)
-        y = -random.randint(90, 280)
+        x = rng.randint(40, WIDTH - 40)
+        y = -rng.randint(90, 280)
         self.rect = self.image.get_rect(center=(x, y))
+        self.x = float(self.rect.x)
+        self.y = float(self.rect.y)
 
-        self.vy = random.randint(METEOR_SPEED_MIN, METEOR_SPEED_MAX) + level * 12
-        self.vx = random.randint(-140, 140)
+        self.vy = rng.randint(METEOR_SPEED_MIN, METEOR_SPEED_MAX) + level * 12
+        self.vx = rng.randint(-140, 140)
 
         self.hp = 3 if self.rect.width >= 80 else 2
 
     def update(self, dt):
-        self.rect.x += int(self.vx * dt)
-        self.rect.y += int(self.vy * dt)
+        self.x += self.vx * dt
+        self.y += self.vy * dt
+        self.rect.x = round(self.x)
+        self.rect.y = round(self.y)
         if self.rect.left < 0 or self.rect.right > WIDTH:
             self.vx *= -1
         if self.rect.top > HEIGHT + 60:
@@ -1,21 +1,229 @@
+import heapq
 import json
 import os
+import queue
+import sqlite3
+import threading
+import time
 
 DATA_DIR = "data"
 HS_FILE = os.path.join(DATA_DIR, "highscore.json")
+RUNS_FILE = os.path.join(DATA_DIR, "runs.jsonl")
+DB_FILE = os.path.join(DATA_DIR, "scores.db")
+RUN_FIELDS = ("ended_at", "day", "score", "wave", "duration", "seed", "outcome")
 
-def load_highscore() -> int:
-    os.makedirs(DATA_DIR, exist_ok=True)
-    if not os.path.exists(HS_FILE):
-        save_highscore(0)
-        return 0
+
+def _fsync_dir(path: str) -> None:
+    # Переименование надёжно только после fsync каталога (на Windows каталог так не открыть)
+    try:
+        fd = os.open(path or ".", os.O_RDONLY)
+    except OSError:
+        return
     try:
-        with open(HS_FILE, "r", encoding="utf-8") as f:
-            return int(json.load(f).get("highscore", 0))
-    except Exception:
-        return 0
-
-def save_highscore(value: int) -> None:
-    os.makedirs(DATA_DIR, exist_ok=True)
-    with open(HS_FILE, "w", encoding="utf-8") as f:
-        json.dump({"highscore": int(value)}, f, ensure_ascii=False, indent=2)
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path: str, data: bytes) -> None:
+    # Пишем во временный файл рядом, fsync и os.replace: после сбоя на диске либо старая
+    # версия целиком, либо новая - но не обрезанный файл
+    folder = os.path.dirname(path)
+    os.makedirs(folder or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    _fsync_dir(folder)
+
+
+def make_run(score: int, wave: int, duration: float, seed: int, outcome: str) -> dict:
+    now = time.time()
+    return {
+        "ended_at": now,
+        "day": time.strftime("%Y-%m-%d", time.localtime(now)),
+        "score": int(score),
+        "wave": int(wave),
+        "duration": round(float(duration), 3),
+        "seed": int(seed),
+        "outcome": outcome,
+    }
+
+
+class JsonStore:
+    # Рекорд - в highscore.json (атомарная замена), партии - строками в runs.jsonl (дозапись + fsync)
+    def __init__(self, hs_file: str = HS_FILE, runs_file: str = RUNS_FILE):
+        self.hs_file = hs_file
+        self.runs_file = runs_file
+        self._best = None
+
+    def _runs(self):
+        try:
+            with open(self.runs_file, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        run = json.loads(line)
+                    except ValueError:
+                        # Оборванная последняя строка после сбоя пропускается
+                        continue
+                    if isinstance(run, dict) and isinstance(run.get("score"), int):
+                        yield run
+        except FileNotFoundError:
+            return
+
+    def best(self) -> int:
+        if self._best is None:
+            try:
+                with open(self.hs_file, "r", encoding="utf-8") as f:
+                    self._best = int(json.load(f).get("highscore", 0))
+            except (OSError, ValueError, AttributeError, TypeError):
+                # Файла нет или он испорчен - рекорд пересчитывается по истории партий
+                self._best = max([0, *(r["score"] for r in self._runs())])
+        return self._best
+
+    def add_run(self, run: dict) -> None:
+        # Неполная запись отвергается до того, как попадёт в файл
+        run = {f: run[f] for f in RUN_FIELDS}
+        os.makedirs(os.path.dirname(self.runs_file) or ".", exist_ok=True)
+        line = (json.dumps(run, ensure_ascii=False) + "\n").encode("utf-8")
+        with open(self.runs_file, "a+b") as f:
+            # Строка, оборванная прошлым сбоем, закрывается, чтобы не склеиться с новой
+            size = f.seek(0, os.SEEK_END)
+            if size:
+                f.seek(size - 1)
+                if f.read(1) != b"\n":
+                    line = b"\n" + line
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        if run["score"] > self.best():
+            self._best = run["score"]
+            atomic_write(self.hs_file, json.dumps({"highscore": self._best}, ensure_ascii=False, indent=2).encode("utf-8"))
+
+    def top(self, n: int = 10, day: str = None) -> list:
+        runs = self._runs() if day is None else (r for r in self._runs() if r["day"] == day)
+        return heapq.nlargest(n, runs, key=lambda r: r["score"])
+
+    def close(self) -> None:
+        pass
+
+
+class SqliteStore:
+    # SQLite в режиме WAL: читатели не ждут писателя, индексы под топ-N и выборку за день.
+    # Соединение своё у каждого потока - sqlite3 не разрешает делить его между потоками
+    COLUMNS = RUN_FIELDS
+
+    def __init__(self, path: str = DB_FILE, legacy_hs_file: str = HS_FILE):
+        self.path = path
+        self._local = threading.local()
+        db = self._db()
+        db.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY,
+                ended_at REAL NOT NULL,
+                day TEXT NOT NULL,
+                score INTEGER NOT NULL,
+                wave INTEGER NOT NULL,
+                duration REAL NOT NULL,
+                seed INTEGER NOT NULL,
+                outcome TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS runs_score ON runs(score DESC);
+            CREATE INDEX IF NOT EXISTS runs_day_score ON runs(day, score DESC);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+        """)
+        # Рекорд, набранный до перехода на базу, переносится из highscore.json один раз
+        with db:
+            db.execute("INSERT OR IGNORE INTO meta VALUES ('highscore', ?)", (self._legacy(legacy_hs_file),))
+
+    @staticmethod
+    def _legacy(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return int(json.load(f).get("highscore", 0))
+        except (OSError, ValueError, AttributeError, TypeError):
+            return 0
+
+    def _db(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            db = sqlite3.connect(self.path)
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=FULL")
+            self._local.db = db
+        return db
+
+    def best(self) -> int:
+        row = self._db().execute(
+            "SELECT MAX(COALESCE((SELECT MAX(score) FROM runs), 0), (SELECT value FROM meta WHERE key = 'highscore'))"
+        ).fetchone()
+        return int(row[0] or 0)
+
+    def add_run(self, run: dict) -> None:
+        db = self._db()
+        with db:
+            db.execute(f"INSERT INTO runs ({', '.join(self.COLUMNS)}) VALUES ({', '.join('?' * len(self.COLUMNS))})",
+                       tuple(run[c] for c in self.COLUMNS))
+
+    def top(self, n: int = 10, day: str = None) -> list:
+        cols = ", ".join(self.COLUMNS)
+        if day is None:
+            rows = self._db().execute(f"SELECT {cols} FROM runs ORDER BY score DESC LIMIT ?", (n,))
+        else:
+            rows = self._db().execute(f"SELECT {cols} FROM runs WHERE day = ? ORDER BY score DESC LIMIT ?", (day, n))
+        return [dict(r) for r in rows]
+
+    def close(self) -> None:
+        db = getattr(self._local, "db", None)
+        if db is not None:
+            db.close()
+            self._local.db = None
+
+
+def open_store(backend: str = "json"):
+    if backend == "sqlite":
+        return SqliteStore()
+    return JsonStore()
+
+
+class ScoreWriter:
+    # Запись партий в фоновом потоке: конец забега только кладёт запись в очередь
+    def __init__(self, store):
+        self.store = store
+        # Ошибки записи копятся здесь; поток при этом не останавливается
+        self.errors = []
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="score-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, run: dict) -> None:
+        self._queue.put(run)
+
+    def _run(self):
+        while True:
+            run = self._queue.get()
+            try:
+                if run is None:
+                    break
+                self.store.add_run(run)
+            except Exception as e:
+                # Любая ошибка на одной записи (диск, база, негодная запись) не должна ронять
+                # поток: иначе flush() при выходе ждал бы очередь вечно
+                self.errors.append(e)
+            finally:
+                self._queue.task_done()
+        self.store.close()
+
+    def flush(self) -> None:
+        self._queue.join()
+
+    def close(self, timeout: float = 5.0) -> None:
+        # При выходе из игры дописываем всё, что осталось в очереди
+        self._queue.put(None)
+        self._thread.join(timeout)
@@ -0,0 +1,118 @@
+import hashlib
+import os
+import struct
+from collections import OrderedDict
+
+import pygame as pg
+
+from .config import DERIVED_CACHE_MB, DERIVED_DISK_CACHE
+
+
+def surface_bytes(surf):
+    return surf.get_pitch() * surf.get_height()
+
+
+class SurfaceCache:
+    def __init__(self, max_bytes, disk_dir=None):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self._cache = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+
+    def __contains__(self, key):
+        return key in self._cache
+
+    def get(self, key):
+        surf = self._cache.get(key)
+        if surf is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+        return surf
+
+    def put(self, key, surf):
+        old = self._cache.pop(key, None)
+        if old is not None:
+            self.bytes -= surface_bytes(old)
+        self._cache[key] = surf
+        self.bytes += surface_bytes(surf)
+        # Вытеснение по памяти, а не по числу записей: поворот босса весит как сотня пуль.
+        # Последнюю вставленную запись не выбрасываем, даже если она одна больше лимита
+        while self.bytes > self.max_bytes and len(self._cache) > 1:
+            _, evicted = self._cache.popitem(last=False)
+            self.bytes -= surface_bytes(evicted)
+            self.evictions += 1
+        return surf
+
+    def get_or_build(self, key, build, stamp=None):
+        # stamp - отпечаток исходного файла; без него запись на диск не попадает
+        surf = self.get(key)
+        if surf is not None:
+            return surf
+        self.misses += 1
+
+        path = self._disk_path(key, stamp)
+        if path is not None:
+            surf = self._read(path)
+            if surf is not None:
+                self.disk_hits += 1
+                return self.put(key, surf)
+
+        surf = build()
+        if path is not None:
+            self._write(path, surf)
+        return self.put(key, surf)
+
+    def _disk_path(self, key, stamp):
+        if self.disk_dir is None or stamp is None:
+            return None
+        digest = hashlib.sha1(repr((key, stamp)).encode("utf-8")).hexdigest()
+        return os.path.join(self.disk_dir, digest + ".rgba")
+
+    def _read(self, path):
+        try:
+            with open(path, "rb") as f:
+                w, h = struct.unpack("<II", f.read(8))
+                data = f.read()
+        except (OSError, struct.error):
+            return None
+        if len(data) != w * h * 4:
+            return None
+        surf = pg.image.frombuffer(data, (w, h), "RGBA")
+        if pg.display.get_surface() is not None:
+            return surf.convert_alpha()
+        return surf.copy()
+
+    def _write(self, path, surf):
+        # Поверхностная прозрачность (set_alpha) в пиксели не попадает - её восстанавливает вызывающий
+        try:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            tmp = path + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(struct.pack("<II", *surf.get_size()))
+                f.write(pg.image.tobytes(surf, "RGBA"))
+            os.replace(tmp, path)
+        except OSError:
+            pass
+
+    def clear(self):
+        self._cache.clear()
+        self.bytes = 0
+
+    def stats(self):
+        return {
+            "size": len(self._cache),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "evictions": self.evictions,
+        }
+
+
+# Общий на процесс кэш производных картинок: переживает перезапуск PlaySession
+DERIVED = SurfaceCache(DERIVED_CACHE_MB * 1024 * 1024,
+                       os.path.join("data", "cache") if DERIVED_DISK_CACHE else None)
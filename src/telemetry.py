@@ -0,0 +1,159 @@
+import gzip
+import json
+import os
+import queue
+import threading
+import time
+
+from .config import TELEMETRY_DIR, TELEMETRY_QUEUE, TELEMETRY_FILE_MB, TELEMETRY_FILES
+
+# События игры (волны, убийства, бонусы, урон, фазы босса, сводки кадров) копятся в
+# ограниченной очереди; поток-писатель сбрасывает их пачками в сжатые JSONL-файлы.
+# emit() никогда не ждёт: если очередь полна (диск не успевает), событие отбрасывается
+# и учитывается в dropped
+
+
+class Telemetry:
+    def __init__(self, folder=TELEMETRY_DIR, capacity=TELEMETRY_QUEUE, batch=512, interval=1.0,
+                 max_bytes=TELEMETRY_FILE_MB * 1024 * 1024, max_files=TELEMETRY_FILES):
+        self.folder = folder
+        self.batch = batch
+        self.interval = interval
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.session = None
+        self.emitted = 0
+        self.dropped = 0
+        self.dropped_events = {}
+        # Потери на стороне писателя (ошибка диска или сериализации) - свой счётчик: dropped
+        # и dropped_events меняет только главный поток
+        self.lost = 0
+        self.written = 0
+        self.closed = False
+        self.batches = 0
+        self.errors = 0
+
+        self._t0 = time.monotonic()
+        self._queue = queue.Queue(maxsize=capacity)
+        self._path = None
+        self._stamp = time.strftime("%Y%m%d-%H%M%S")
+        self._part = 0
+        self._thread = threading.Thread(target=self._run, name="telemetry", daemon=True)
+        self._thread.start()
+
+    def emit(self, event, **fields):
+        # Главный поток только кладёт кортеж в очередь; JSON и сжатие - в потоке-писателе
+        if self.closed:
+            return
+        try:
+            self._queue.put_nowait((time.monotonic() - self._t0, self.session, event, fields))
+            self.emitted += 1
+        except queue.Full:
+            self.dropped += 1
+            self.dropped_events[event] = self.dropped_events.get(event, 0) + 1
+
+    def _take(self):
+        # Ждём первое событие не дольше interval, потом забираем всё, что есть, до batch штук
+        items = []
+        try:
+            items.append(self._queue.get(timeout=self.interval))
+        except queue.Empty:
+            return items
+        while len(items) < self.batch:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    def _run(self):
+        running = True
+        while running:
+            items = self._take()
+            if items and items[-1] is None:
+                items.pop()
+                running = False
+            if not items:
+                continue
+            lines = []
+            for t, session, event, fields in items:
+                try:
+                    lines.append(json.dumps({"t": round(t, 4), "session": session, "event": event, **fields},
+                                            ensure_ascii=False, default=_plain))
+                except (TypeError, ValueError):
+                    # Событие, которое не сериализуется, теряется само, не останавливая поток
+                    self.errors += 1
+                    self.lost += 1
+            if not lines:
+                continue
+            try:
+                self._write(("\n".join(lines) + "\n").encode("utf-8"))
+                self.written += len(lines)
+                self.batches += 1
+            except OSError:
+                self.errors += 1
+                self.lost += len(lines)
+
+    def _write(self, data):
+        if self._path is None or os.path.getsize(self._path) >= self.max_bytes:
+            self._rotate()
+        # Каждая пачка - отдельный gzip-член: файл читается gzip.open целиком и после сбоя
+        # теряется не больше последней пачки
+        with open(self._path, "ab") as f:
+            f.write(gzip.compress(data, compresslevel=6))
+
+    def _rotate(self):
+        os.makedirs(self.folder, exist_ok=True)
+        self._part += 1
+        self._path = os.path.join(self.folder, f"events-{self._stamp}-{self._part:03d}.jsonl.gz")
+        open(self._path, "ab").close()
+        files = sorted(f for f in os.listdir(self.folder) if f.startswith("events-") and f.endswith(".jsonl.gz"))
+        for name in files[:-self.max_files]:
+            try:
+                os.remove(os.path.join(self.folder, name))
+            except OSError:
+                pass
+
+    def stats(self):
+        return {
+            "emitted": self.emitted,
+            "written": self.written,
+            "dropped": self.dropped,
+            "dropped_events": dict(self.dropped_events),
+            "lost": self.lost,
+            "batches": self.batches,
+            "errors": self.errors,
+            "queued": self._queue.qsize(),
+        }
+
+    def close(self, timeout=5.0):
+        if self.closed:
+            return
+        self.closed = True
+        # Сигнал остановки ставится блокирующе: очередь может быть полной
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+
+def _plain(value):
+    # numpy-числа и прочее, чего json не знает: число через item(), остальное строкой
+    item = getattr(value, "item", None)
+    if item is not None:
+        return item()
+    return str(value)
+
+
+def frame_summary(frame_ms):
+    # Сводка по окну кадров вместо события на каждый кадр
+    ordered = sorted(frame_ms)
+    n = len(ordered)
+    return {
+        "frames": n,
+        "mean_ms": round(sum(ordered) / n, 3),
+        "p50_ms": round(ordered[n // 2], 3),
+        "p95_ms": round(ordered[min(n - 1, int(n * 0.95))], 3),
+        "max_ms": round(ordered[-1], 3),
+    }
@@ -0,0 +1,53 @@
+from collections import OrderedDict
+
+
+class TextCache:
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, tuple(color), antialias)
+        surf = self._cache.get(key)
+        if surf is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return surf
+
+        self.misses += 1
+        surf = font.render(text, antialias, color)
+        self._cache[key] = surf
+        if len(self._cache) > self.capacity:
+            self._cache.popitem(last=False)
+            self.evictions += 1
+        return surf
+
+    def draw_counter(self, surface, font, label, value, color, pos):
+        # Подпись и каждая цифра - отдельные закэшированные поверхности,
+        # поэтому меняющийся счёт не создаёт новую поверхность каждый кадр
+        x, y = pos
+        label_surf = self.render(font, label, color)
+        rect = surface.blit(label_surf, (x, y))
+        x += label_surf.get_width()
+        for ch in str(value):
+            glyph = self.render(font, ch, color)
+            rect.union_ip(surface.blit(glyph, (x, y)))
+            x += glyph.get_width()
+        return rect
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
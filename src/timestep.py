@@ -0,0 +1,25 @@
+class FixedTimestep:
+    def __init__(self, hz, max_steps):
+        self.dt = 1.0 / hz
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+        self.dropped = 0.0
+
+    def reset(self):
+        self.accumulator = 0.0
+
+    def advance(self, frame_dt):
+        self.accumulator += frame_dt
+        steps = int(self.accumulator / self.dt)
+        if steps > self.max_steps:
+            # После долгой заминки не догоняем всё: лишнее время просто отбрасываем
+            skipped = steps - self.max_steps
+            self.accumulator -= skipped * self.dt
+            self.dropped += skipped * self.dt
+            steps = self.max_steps
+        self.accumulator -= steps * self.dt
+        return steps
+
+    @property
+    def alpha(self):
+        return self.accumulator / self.dt
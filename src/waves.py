@@ -0,0 +1,259 @@
+import json
+import os
+
+import numpy as np
+
+from .config import WIDTH, WAVES_FILE
+
+# Кампания волн описана в assets/waves.json и при загрузке проверяется и компилируется:
+# построения превращаются в готовые таблицы позиций (numpy), параметры волн - в поля Wave.
+# Появление волны - копия таблицы в FormationController, без геометрии в Python
+
+KINDS = ("enemy1", "enemy2")
+WAVE_KEYS = {"pattern", "x", "dx", "dy", "start_y", "enemy2", "kinds", "shoot_rate", "speed", "scroll",
+             "meteors", "boss"}
+PATTERN_KEYS = {"rows", "v", "points"}
+
+
+class CampaignError(ValueError):
+    pass
+
+
+class Wave:
+    def __init__(self):
+        self.number = 0
+        self.pattern = None
+        self.xs = None
+        self.ys = None
+        self.left = 0.0
+        self.right = 0.0
+        self.start_y = 70
+        # Состав: либо шанс enemy2 на каждый корабль, либо фиксированные типы по слотам
+        self.enemy2 = 0.0
+        self.kinds = None
+        self.shoot_rate = 1.0
+        self.speed = 0.0
+        self.scroll = 0.0
+        self.meteors = True
+        self.meteor_ms = 1400
+        self.meteor_level = 1
+        self.boss = None
+
+    def __len__(self):
+        return 0 if self.xs is None else len(self.xs)
+
+
+class Boss:
+    def __init__(self, hp=None, final=True):
+        # hp=None - BOSS_HP из config; убийство финального босса выигрывает партию
+        self.hp = hp
+        self.final = final
+
+
+class Campaign:
+    def __init__(self, waves, loop, path=None):
+        self.waves = waves
+        self.loop = loop
+        self.path = path
+
+    def __len__(self):
+        return len(self.waves)
+
+    def wave(self, number):
+        # Номера с 1; после последней волны кампания идёт по кругу с волны loop
+        n = len(self.waves)
+        if number <= n:
+            return self.waves[number - 1]
+        start = self.loop - 1
+        return self.waves[start + (number - 1 - start) % (n - start)]
+
+
+def _check(cond, where, message):
+    if not cond:
+        raise CampaignError(f"{where}: {message}")
+
+
+def _number(value, where, minimum=None, integer=False):
+    ok = isinstance(value, int if integer else (int, float)) and not isinstance(value, bool)
+    _check(ok, where, f"expected {'an integer' if integer else 'a number'}, got {value!r}")
+    if minimum is not None:
+        _check(value >= minimum, where, f"must be >= {minimum}, got {value!r}")
+    return value
+
+
+def _rows(counts, cx, dx, dy):
+    # Ряды кораблей, каждый по центру: [1, 2, 3, 2, 1] - ромб, [10] - линия, [8, 8] - две линии
+    pts = []
+    y = 0
+    for n in counts:
+        x0 = cx - (n - 1) * dx / 2
+        for i in range(n):
+            pts.append((x0 + i * dx, y))
+        y += dy
+    return pts
+
+
+def _v(n, cx, dx, dy):
+    half = n // 2
+    return [(cx + (i - half) * dx, abs(i - half) * dy) for i in range(n)]
+
+
+def compile_pattern(spec, where, cx, dx, dy):
+    _check(isinstance(spec, dict), where, "pattern must be an object")
+    shapes = PATTERN_KEYS & spec.keys()
+    _check(len(shapes) == 1, where, f"pattern needs exactly one of {sorted(PATTERN_KEYS)}")
+    extra = spec.keys() - PATTERN_KEYS - {"x", "dx", "dy"}
+    _check(not extra, where, f"unknown keys {sorted(extra)}")
+    cx = _number(spec.get("x", cx), f"{where}.x")
+    dx = _number(spec.get("dx", dx), f"{where}.dx")
+    dy = _number(spec.get("dy", dy), f"{where}.dy")
+
+    if "rows" in spec:
+        counts = spec["rows"]
+        _check(isinstance(counts, list) and counts, f"{where}.rows", "expected a non-empty list")
+        for i, n in enumerate(counts):
+            _number(n, f"{where}.rows[{i}]", minimum=1, integer=True)
+        pts = _rows(counts, cx, dx, dy)
+    elif "v" in spec:
+        pts = _v(_number(spec["v"], f"{where}.v", minimum=1, integer=True), cx, dx, dy)
+    else:
+        points = spec["points"]
+        _check(isinstance(points, list) and points, f"{where}.points", "expected a non-empty list")
+        pts = []
+        for i, p in enumerate(points):
+            _check(isinstance(p, list) and len(p) == 2, f"{where}.points[{i}]", "expected [x, y]")
+            # Точки заданы смещением от центра строя
+            pts.append((cx + _number(p[0], f"{where}.points[{i}]"), _number(p[1], f"{where}.points[{i}]")))
+
+    xs = np.array([p[0] for p in pts], dtype=np.float64)
+    ys = np.array([p[1] for p in pts], dtype=np.float64)
+    xs.flags.writeable = False
+    ys.flags.writeable = False
+    return xs, ys
+
+
+def _meteors(spec, where, wave):
+    if spec is False:
+        wave.meteors = False
+        return
+    _check(isinstance(spec, dict), where, "expected an object or false")
+    extra = spec.keys() - {"every_ms", "level", "enabled"}
+    _check(not extra, where, f"unknown keys {sorted(extra)}")
+    _check("every_ms" in spec, where, "every_ms is required")
+    wave.meteor_ms = _number(spec["every_ms"], f"{where}.every_ms", minimum=1)
+    wave.meteor_level = _number(spec.get("level", 1), f"{where}.level", minimum=0, integer=True)
+    # enabled=false: падение метеоров стоит, но таймер идёт с этим интервалом
+    enabled = spec.get("enabled", True)
+    _check(isinstance(enabled, bool), f"{where}.enabled", "expected true or false")
+    wave.meteors = enabled
+
+
+def compile_campaign(data, path=None):
+    _check(isinstance(data, dict), "campaign", "expected an object")
+    extra = data.keys() - {"patterns", "defaults", "waves", "loop"}
+    _check(not extra, "campaign", f"unknown keys {sorted(extra)}")
+    patterns = data.get("patterns", {})
+    defaults = data.get("defaults", {})
+    waves = data.get("waves")
+    _check(isinstance(patterns, dict), "patterns", "expected an object")
+    _check(isinstance(defaults, dict), "defaults", "expected an object")
+    _check(isinstance(waves, list) and waves, "waves", "expected a non-empty list")
+    extra = defaults.keys() - WAVE_KEYS
+    _check(not extra, "defaults", f"unknown keys {sorted(extra)}")
+
+    # Таблица позиций считается один раз на построение и его шаг; волны делят её
+    tables = {}
+    compiled = []
+    for i, raw in enumerate(waves):
+        where = f"waves[{i}]"
+        _check(isinstance(raw, dict), where, "expected an object")
+        extra = raw.keys() - WAVE_KEYS
+        _check(not extra, where, f"unknown keys {sorted(extra)}")
+        spec = {**defaults, **raw}
+        w = Wave()
+        w.number = i + 1
+
+        if "meteors" in spec:
+            _meteors(spec["meteors"], f"{where}.meteors", w)
+        if "scroll" in spec:
+            w.scroll = _number(spec["scroll"], f"{where}.scroll", minimum=0)
+
+        if raw.get("boss") is not None:
+            boss = raw["boss"]
+            _check(isinstance(boss, dict), f"{where}.boss", "expected an object")
+            extra = boss.keys() - {"hp", "final"}
+            _check(not extra, f"{where}.boss", f"unknown keys {sorted(extra)}")
+            hp = boss.get("hp")
+            if hp is not None:
+                _number(hp, f"{where}.boss.hp", minimum=1, integer=True)
+            final = boss.get("final", True)
+            _check(isinstance(final, bool), f"{where}.boss.final", "expected true or false")
+            w.boss = Boss(hp, final)
+            compiled.append(w)
+            continue
+
+        _check("pattern" in spec, where, "pattern is required for a formation wave")
+        name = spec["pattern"]
+        # Проверяются до того, как попадут в ключ кэша таблиц
+        cx = _number(spec.get("x", WIDTH // 2), f"{where}.x")
+        dx = _number(spec.get("dx", 92), f"{where}.dx")
+        dy = _number(spec.get("dy", 70), f"{where}.dy")
+        if isinstance(name, str):
+            _check(name in patterns, f"{where}.pattern", f"unknown pattern {name!r}")
+            key = (name, cx, dx, dy)
+            if key not in tables:
+                tables[key] = compile_pattern(patterns[name], f"patterns.{name}", cx, dx, dy)
+            w.pattern = name
+            w.xs, w.ys = tables[key]
+        else:
+            w.pattern = "inline"
+            w.xs, w.ys = compile_pattern(name, f"{where}.pattern", cx, dx, dy)
+        w.left = float(w.xs.min())
+        w.right = float(w.xs.max())
+        w.start_y = _number(spec.get("start_y", 70), f"{where}.start_y")
+
+        if "kinds" in spec:
+            kinds = spec["kinds"]
+            _check(isinstance(kinds, list) and kinds, f"{where}.kinds", "expected a non-empty list")
+            for k, kind in enumerate(kinds):
+                _check(kind in KINDS, f"{where}.kinds[{k}]", f"unknown enemy {kind!r}")
+            # Короткий список повторяется по слотам строя
+            w.kinds = tuple(kinds[k % len(kinds)] for k in range(len(w)))
+        else:
+            w.enemy2 = _number(spec.get("enemy2", 0.0), f"{where}.enemy2", minimum=0)
+            _check(w.enemy2 <= 1, f"{where}.enemy2", "chance must be <= 1")
+        w.shoot_rate = _number(spec.get("shoot_rate", 1.0), f"{where}.shoot_rate", minimum=0)
+        _check("speed" in spec, where, "speed is required for a formation wave")
+        w.speed = _number(spec["speed"], f"{where}.speed", minimum=0)
+        compiled.append(w)
+
+    loop = data.get("loop", len(compiled))
+    _number(loop, "loop", minimum=1, integer=True)
+    _check(loop <= len(compiled), "loop", f"no wave {loop} in a campaign of {len(compiled)}")
+    return Campaign(compiled, loop, path)
+
+
+_cache = {}
+
+
+def load(path=None):
+    # Кампания компилируется один раз на процесс; изменённый файл перечитывается
+    path = path or WAVES_FILE
+    try:
+        stamp = os.stat(path).st_mtime_ns
+    except OSError as e:
+        raise CampaignError(f"{path}: {e.strerror}") from e
+    cached = _cache.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            data = json.load(f)
+        except ValueError as e:
+            raise CampaignError(f"{path}: {e}") from e
+    try:
+        campaign = compile_campaign(data, path)
+    except CampaignError as e:
+        raise CampaignError(f"{path}: {e}") from None
+    _cache[path] = (stamp, campaign)
+    return campaign